@@ -1,8 +1,11 @@
+from ._dataset import MultiSplitDataset
 from ._tree import MultiSplitDecisionTreeClassifier
-from ._tree_node import TreeNode
+from ._tree_node import Split, TreeNode
 
 
 __all__ = [
+    'MultiSplitDataset',
     'MultiSplitDecisionTreeClassifier',
+    'Split',
     'TreeNode',
 ]
@@ -0,0 +1,331 @@
+import functools
+import importlib.util
+from types import SimpleNamespace
+
+import numpy as np
+
+from multi_split_decision_tree._flat_tree import CATEGORICAL, LEAF, NUMERICAL, FlatTree
+from multi_split_decision_tree._utils import entropy, gini_index, one_hot_group_counts
+
+
+class NumpyBackend:
+    """
+    The reference implementation of the kernels of the split search and prediction
+    with vectorised NumPy.
+    """
+    name = "numpy"
+
+    def impurity(self, criterion: str):
+        """Returns the impurity function of the class counts stored along the last axis."""
+        return gini_index if criterion == "gini" else entropy
+
+    def cumulative_class_counts(
+        self,
+        y: np.ndarray,
+        weights: np.ndarray,
+        n_classes: int,
+    ) -> np.ndarray:
+        """
+        Sweeps over the sorted samples: the row `i` of the result is the weight of each
+        class among the samples up to the `i`-th one inclusive.
+        """
+        return (np.eye(n_classes)[y] * weights[:, np.newaxis]).cumsum(axis=0)
+
+    def class_histogram(
+        self,
+        codes: np.ndarray,
+        y: np.ndarray,
+        weights: np.ndarray,
+        n_codes: int,
+        n_classes: int,
+    ) -> np.ndarray:
+        """Builds the table of the weight of the samples of each class with each code."""
+        return np.bincount(
+            codes.astype(np.intp) * n_classes + y,
+            weights,
+            minlength=n_codes * n_classes,
+        ).reshape(n_codes, n_classes)
+
+    def group_counts(
+        self,
+        assignments: np.ndarray,
+        max_groups: int,
+        class_counts: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Calculates the class counts of the groups of each partition from the matrix of
+        the group numbers of the categories and their class counts.
+        """
+        return one_hot_group_counts(assignments, max_groups, class_counts)
+
+    def traverse(self, flat_tree: FlatTree, values: np.ndarray) -> np.ndarray:
+        """
+        Routes all the samples through the tree level by level.
+
+        A sample with a missing value of the split feature goes to all the children
+        of the node, the result is the sum of the class distributions of all the
+        reached leaves.
+        """
+        n_samples = values.shape[0]
+
+        distributions = np.zeros((n_samples, flat_tree.distributions.shape[1]))
+        rows = np.arange(n_samples)
+        nodes = np.zeros(n_samples, dtype=np.int32)
+        while len(rows):
+            kind = flat_tree.kind[nodes]
+            if values.shape[1]:
+                x = values[rows, flat_tree.feature[nodes]]
+            else:
+                x = np.full(len(rows), np.nan)
+            is_na = np.isnan(x) & (kind != LEAF)
+
+            childs = np.full(len(rows), -1, dtype=np.int32)
+
+            is_numerical = (kind == NUMERICAL) & ~is_na
+            numerical_nodes = nodes[is_numerical]
+            childs[is_numerical] = flat_tree.childs[
+                flat_tree.child_start[numerical_nodes]
+                + (x[is_numerical] > flat_tree.threshold[numerical_nodes])
+            ]
+
+            is_categorical = (kind == CATEGORICAL) & ~is_na
+            codes = x[is_categorical].astype(np.intp)
+            childs[is_categorical] = np.where(
+                codes >= 0,
+                flat_tree.lookup[flat_tree.lookup_start[nodes[is_categorical]] + codes],
+                -1,
+            )
+
+            # leaves and nodes without a branch for the category make predictions
+            is_reached = (childs == -1) & ~is_na
+            np.add.at(
+                distributions,
+                rows[is_reached],
+                flat_tree.distributions[nodes[is_reached]],
+            )
+
+            # samples with missing values go to all the children
+            na_nodes = nodes[is_na]
+            repeats = flat_tree.n_childs[na_nodes]
+            offsets = (
+                np.arange(repeats.sum())
+                - np.repeat(repeats.cumsum() - repeats, repeats)
+            )
+            na_childs = flat_tree.childs[
+                np.repeat(flat_tree.child_start[na_nodes], repeats) + offsets]
+
+            is_moving = childs != -1
+            rows = np.concatenate([rows[is_moving], np.repeat(rows[is_na], repeats)])
+            nodes = np.concatenate([childs[is_moving], na_childs])
+
+        return distributions
+
+
+class NumbaBackend(NumpyBackend):
+    """
+    The kernels compiled by Numba into loops over the samples, which don't allocate
+    temporary arrays and release the GIL, so the threads of `n_jobs` run in parallel.
+    """
+    name = "numba"
+
+    def __init__(self) -> None:
+        # fail early if numba isn't installed
+        numba_kernels()
+
+    def impurity(self, criterion: str):
+        return numba_gini_index if criterion == "gini" else numba_entropy
+
+    def cumulative_class_counts(self, y, weights, n_classes):
+        return numba_kernels().cumulative_class_counts(
+            y.astype(np.intp), weights.astype(np.float64), n_classes)
+
+    def class_histogram(self, codes, y, weights, n_codes, n_classes):
+        return numba_kernels().class_histogram(
+            codes.astype(np.intp),
+            y.astype(np.intp),
+            weights.astype(np.float64),
+            n_codes,
+            n_classes,
+        )
+
+    def group_counts(self, assignments, max_groups, class_counts):
+        return numba_kernels().group_counts(
+            assignments, max_groups, class_counts.astype(np.float64))
+
+    def traverse(self, flat_tree, values):
+        return numba_kernels().traverse(
+            flat_tree.kind,
+            flat_tree.feature,
+            flat_tree.threshold,
+            flat_tree.child_start,
+            flat_tree.n_childs,
+            flat_tree.childs,
+            flat_tree.lookup_start,
+            flat_tree.lookup,
+            flat_tree.distributions,
+            np.ascontiguousarray(values, dtype=np.float64),
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def numba_kernels() -> SimpleNamespace:
+    """Compiles the kernels of `NumbaBackend` on the first use."""
+    try:
+        import numba
+    except ImportError as error:
+        raise ImportError(
+            "The numba backend requires numba. You can install it with"
+            " `pip install numba`."
+        ) from error
+
+    jit = numba.njit(nogil=True)
+
+    @jit
+    def gini_index(counts):
+        n_rows, n_classes = counts.shape
+        result = np.zeros(n_rows)
+        for i in range(n_rows):
+            N = 0.
+            for j in range(n_classes):
+                N += counts[i, j]
+            if not N > 0:
+                N = 1.
+            for j in range(n_classes):
+                p = counts[i, j] / N
+                result[i] += p * (1 - p)
+        return result
+
+    @jit
+    def entropy(counts):
+        n_rows, n_classes = counts.shape
+        result = np.zeros(n_rows)
+        for i in range(n_rows):
+            N = 0.
+            for j in range(n_classes):
+                N += counts[i, j]
+            if not N > 0:
+                N = 1.
+            for j in range(n_classes):
+                p = counts[i, j] / N
+                if p > 0:
+                    result[i] -= p * np.log2(p)
+        return result
+
+    @jit
+    def cumulative_class_counts(y, weights, n_classes):
+        result = np.zeros((len(y), n_classes))
+        running = np.zeros(n_classes)
+        for i in range(len(y)):
+            running[y[i]] += weights[i]
+            result[i] = running
+        return result
+
+    @jit
+    def class_histogram(codes, y, weights, n_codes, n_classes):
+        result = np.zeros((n_codes, n_classes))
+        for i in range(len(codes)):
+            result[codes[i], y[i]] += weights[i]
+        return result
+
+    @jit
+    def group_counts(assignments, max_groups, class_counts):
+        n_partitions, n_values = assignments.shape
+        result = np.zeros((n_partitions, max_groups, class_counts.shape[1]))
+        for i in range(n_partitions):
+            for k in range(n_values):
+                result[i, assignments[i, k]] += class_counts[k]
+        return result
+
+    @jit
+    def traverse(
+        kind,
+        feature,
+        threshold,
+        child_start,
+        n_childs,
+        childs,
+        lookup_start,
+        lookup,
+        distributions,
+        values,
+    ):
+        n_samples = values.shape[0]
+        result = np.zeros((n_samples, distributions.shape[1]))
+        # each node is pushed at most once per sample
+        stack = np.empty(len(kind), dtype=np.int32)
+        for i in range(n_samples):
+            stack[0] = 0
+            top = 1
+            while top:
+                top -= 1
+                node = stack[top]
+                if kind[node] == LEAF:
+                    result[i] += distributions[node]
+                    continue
+
+                x = values[i, feature[node]]
+                if np.isnan(x):
+                    # samples with missing values go to all the children
+                    for child in childs[child_start[node]:child_start[node] + n_childs[node]]:
+                        stack[top] = child
+                        top += 1
+                    continue
+
+                if kind[node] == NUMERICAL:
+                    child = childs[child_start[node] + (1 if x > threshold[node] else 0)]
+                else:
+                    code = int(x)
+                    child = lookup[lookup_start[node] + code] if code >= 0 else -1
+
+                # nodes without a branch for the category make predictions
+                if child == -1:
+                    result[i] += distributions[node]
+                else:
+                    stack[top] = child
+                    top += 1
+        return result
+
+    return SimpleNamespace(
+        gini_index=gini_index,
+        entropy=entropy,
+        cumulative_class_counts=cumulative_class_counts,
+        class_histogram=class_histogram,
+        group_counts=group_counts,
+        traverse=traverse,
+    )
+
+
+def numba_gini_index(counts: np.ndarray) -> np.ndarray:
+    """Calculates Gini index from the class counts stored along the last axis."""
+    return apply_to_rows(numba_kernels().gini_index, counts)
+
+
+def numba_entropy(counts: np.ndarray) -> np.ndarray:
+    """Calculates entropy from the class counts stored along the last axis."""
+    return apply_to_rows(numba_kernels().entropy, counts)
+
+
+def apply_to_rows(kernel, counts: np.ndarray) -> np.ndarray:
+    """Applies the kernel of a matrix of class counts to an array of any shape."""
+    counts = np.asarray(counts, dtype=np.float64)
+    rows = np.ascontiguousarray(counts.reshape(-1, counts.shape[-1]))
+
+    return kernel(rows).reshape(counts.shape[:-1])[()]
+
+
+BACKENDS = {
+    "numpy": NumpyBackend,
+    "numba": NumbaBackend,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_backend(name: str) -> NumpyBackend:
+    """
+    Returns the backend by its name, 'auto' is 'numba' if numba is installed, else
+    'numpy'.
+    """
+    if name == "auto":
+        name = "numba" if importlib.util.find_spec("numba") is not None else "numpy"
+
+    return BACKENDS[name]()
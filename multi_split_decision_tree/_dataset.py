@@ -0,0 +1,159 @@
+"""Training datasets read in batches or preprocessed once for many fits."""
+import os
+import pickle
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+
+# the maximum number of values of a numerical feature sampled to find bin thresholds
+MAX_BIN_SAMPLES = 200_000
+
+FORMATS = {"parquet": "parquet", "arrow": "ipc"}
+
+
+def open_dataset(source, format: str):
+    """
+    Opens a Parquet or Arrow IPC dataset with pyarrow without reading it.
+
+    Parameters:
+        source: path to a file or a directory of files, or list of paths to files.
+        format: 'parquet' or 'arrow'.
+
+    Returns:
+        pyarrow.dataset.Dataset.
+    """
+    try:
+        import pyarrow.dataset as ds
+    except ImportError as error:
+        raise ImportError(
+            "Training from a dataset requires pyarrow. You can install it with"
+            " `pip install pyarrow`."
+        ) from error
+
+    return ds.dataset(source, format=FORMATS[format])
+
+
+def iter_batches(dataset, columns: list[str], batch_size: int) -> Iterator[pd.DataFrame]:
+    """Reads the columns of the dataset in batches of at most `batch_size` rows."""
+    for record_batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if record_batch.num_rows:
+            yield record_batch.to_pandas()
+
+
+class MultiSplitDataset:
+    """
+    Training set preprocessed once for many fits.
+
+    The features are stored as the rows of the class histograms: the bins of the
+    numerical features with missing values in the last bin, the codes of the
+    categorical and rank features shifted by one with missing and unknown values in
+    the first row. The dataset saved to a directory is memory-mapped read-only, so
+    the processes fitting on it share the pages, and pickling it passes only the path.
+
+    Made by `MultiSplitDecisionTreeClassifier.make_dataset`, a saved dataset is opened
+    with `MultiSplitDataset.load`.
+
+    Attributes:
+        metadata: the features and the preprocessing: feature kinds, class names,
+          missing values handling and fillers, categories, bin thresholds.
+        feature_names: the names of the stored features.
+        features: matrix of the stored features, one row per feature.
+        target: label-encoded target.
+        path: the directory of the saved dataset, None if it's kept in memory.
+    """
+    METADATA_FILE = "metadata.pkl"
+    FEATURES_FILE = "features.npy"
+    TARGET_FILE = "target.npy"
+
+    def __init__(
+        self,
+        metadata: dict,
+        feature_names: list[str],
+        features: np.ndarray,
+        target: np.ndarray,
+        path: str | os.PathLike | None = None,
+    ) -> None:
+        self.metadata = metadata
+        self.feature_names = feature_names
+        self.features = features
+        self.target = target
+        self.path = path
+        self.__feature_indexes = {
+            feature_name: i for i, feature_name in enumerate(feature_names)}
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(n_samples={len(self)},"
+            f" n_features={len(self.feature_names)}, path={self.path!r})"
+        )
+
+    def __len__(self) -> int:
+        return len(self.target)
+
+    def __getitem__(self, feature_name: str) -> np.ndarray:
+        """Returns the stored feature."""
+        return np.asarray(self.features[self.__feature_indexes[feature_name]])
+
+    def __reduce__(self):
+        if self.path is None:
+            return super().__reduce__()
+        return self.__class__.load, (self.path,)
+
+    @classmethod
+    def create(
+        cls,
+        metadata: dict,
+        feature_names: list[str],
+        n_samples: int,
+        dtype: np.dtype,
+        path: str | os.PathLike | None = None,
+    ) -> "MultiSplitDataset":
+        """
+        Allocates a writable dataset, memory-mapped to the files in `path` if it's
+        set. Call `flush` after filling it.
+        """
+        shape = (len(feature_names), n_samples)
+        if path is None:
+            features = np.empty(shape, dtype=dtype)
+            target = np.empty(n_samples, dtype=np.int32)
+        else:
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, cls.METADATA_FILE), "wb") as file:
+                pickle.dump(dict(metadata, feature_names_stored=feature_names), file)
+            features = np.lib.format.open_memmap(
+                os.path.join(path, cls.FEATURES_FILE), mode="w+", dtype=dtype, shape=shape)
+            target = np.lib.format.open_memmap(
+                os.path.join(path, cls.TARGET_FILE),
+                mode="w+",
+                dtype=np.int32,
+                shape=(n_samples,),
+            )
+
+        return cls(metadata, feature_names, features, target, path)
+
+    def flush(self) -> "MultiSplitDataset":
+        """
+        Writes the filled dataset to the disk and reopens it read-only, a dataset in
+        memory is returned as is.
+        """
+        if self.path is None:
+            return self
+
+        self.features.flush()
+        self.target.flush()
+        del self.features, self.target
+
+        return self.load(self.path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "MultiSplitDataset":
+        """Opens the dataset saved to the directory, memory-mapped read-only."""
+        with open(os.path.join(path, cls.METADATA_FILE), "rb") as file:
+            metadata = pickle.load(file)
+        feature_names = metadata.pop("feature_names_stored")
+        features = np.load(os.path.join(path, cls.FEATURES_FILE), mmap_mode="r")
+        target = np.load(os.path.join(path, cls.TARGET_FILE), mmap_mode="r")
+
+        return cls(metadata, feature_names, features, target, path)
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+from multi_split_decision_tree._tree_node import TreeNode
+
+
+LEAF = 0
+NUMERICAL = 1
+CATEGORICAL = 2
+
+
+class FlatTree:
+    """
+    Decision tree compiled into flat arrays for vectorised prediction.
+
+    The nodes are numbered in breadth-first order. The children of a node are stored
+    contiguously in `childs` starting from `child_start`. Categorical and rank nodes
+    route a sample through a lookup table: the row of the node in `lookup` maps the
+    code of each training category of the split feature to the child, or -1 if no
+    child contains it.
+
+    For single records the nodes are also compiled into `descriptors`, tuples of plain
+    Python objects `(kind, feature_name, threshold, childs, lookup, distribution)`
+    where `lookup` maps the categories of a categorical or rank node to the children.
+    """
+    def __init__(self, root: TreeNode, n_classes: int) -> None:
+        nodes = [root]
+        for node in nodes:
+            nodes.extend(node.childs)
+        node_indexes = {id(node): i for i, node in enumerate(nodes)}
+        n_nodes = len(nodes)
+
+        self.feature_names = []
+        self.categories = {}
+        for node in nodes:
+            if node.is_leaf:
+                continue
+            split = node.split
+            if split.feature_name not in self.feature_names:
+                self.feature_names.append(split.feature_name)
+            if split.split_type != "numerical":
+                self.categories.setdefault(split.feature_name, set()).update(
+                    *split.categories)
+        self.categories = {
+            feature_name: pd.Index(list(categories))
+            for feature_name, categories in self.categories.items()
+        }
+
+        self.kind = np.full(n_nodes, LEAF, dtype=np.int8)
+        self.feature = np.full(n_nodes, -1, dtype=np.int32)
+        self.threshold = np.full(n_nodes, np.nan)
+        self.child_start = np.zeros(n_nodes, dtype=np.int32)
+        self.n_childs = np.zeros(n_nodes, dtype=np.int32)
+        self.lookup_start = np.zeros(n_nodes, dtype=np.int32)
+        self.distributions = np.zeros((n_nodes, n_classes))
+
+        childs = []
+        lookup = []
+        for i, node in enumerate(nodes):
+            self.distributions[i] = node.distribution
+            if node.is_leaf:
+                continue
+
+            split = node.split
+            self.feature[i] = self.feature_names.index(split.feature_name)
+            self.child_start[i] = len(childs)
+            self.n_childs[i] = len(node.childs)
+            childs.extend(node_indexes[id(child)] for child in node.childs)
+
+            if split.split_type == "numerical":
+                self.kind[i] = NUMERICAL
+                self.threshold[i] = split.threshold
+            else:
+                self.kind[i] = CATEGORICAL
+                categories = self.categories[split.feature_name]
+                node_lookup = np.full(len(categories), -1, dtype=np.int32)
+                for child, child_categories in zip(node.childs, split.categories):
+                    node_lookup[categories.get_indexer(list(child_categories))] = \
+                        node_indexes[id(child)]
+                self.lookup_start[i] = len(lookup)
+                lookup.extend(node_lookup)
+
+        self.childs = np.array(childs, dtype=np.int32)
+        self.lookup = np.array(lookup, dtype=np.int32)
+
+        self.descriptors = []
+        for i, node in enumerate(nodes):
+            distribution = self.distributions[i].tolist()
+            if node.is_leaf:
+                self.descriptors.append((LEAF, None, None, (), None, distribution))
+                continue
+
+            split = node.split
+            childs = tuple(node_indexes[id(child)] for child in node.childs)
+            if split.split_type == "numerical":
+                self.descriptors.append(
+                    (NUMERICAL, split.feature_name, split.threshold, childs, None,
+                     distribution))
+            else:
+                node_lookup = {
+                    category: child
+                    for child, child_categories in zip(childs, split.categories)
+                    for category in child_categories
+                }
+                self.descriptors.append(
+                    (CATEGORICAL, split.feature_name, None, childs, node_lookup,
+                     distribution))
+
+    def encode(self, X: pd.DataFrame, fill_values: dict) -> np.ndarray:
+        """
+        Builds the matrix of the split features values straight from the columns of X,
+        without copying the frame: numerical features as is, categorical and rank
+        features as category codes, -1 for unseen categories. Missing values are
+        replaced with the values of `fill_values` (encoded in the same way) or are NaN.
+        """
+        values = np.empty((X.shape[0], len(self.feature_names)))
+        for j, feature_name in enumerate(self.feature_names):
+            column = X[feature_name]
+            fill_value = fill_values.get(feature_name, np.nan)
+            if feature_name in self.categories:
+                categories = self.categories[feature_name]
+                values[:, j] = categories.get_indexer(column)
+                is_na = column.isna().to_numpy()
+                if not is_missing(fill_value):
+                    fill_value = categories.get_indexer([fill_value])[0]
+            else:
+                values[:, j] = column.to_numpy(dtype=np.float64, na_value=np.nan)
+                is_na = np.isnan(values[:, j])
+            values[is_na, j] = fill_value
+
+        return values
+
+    def predict_proba_one(self, record: dict, fill_values: dict) -> list[float]:
+        """
+        Routes a single record through the `descriptors` without NumPy and pandas.
+
+        Parameters:
+            record: the values of the features, absent features are missing.
+            fill_values: the values that replace the missing values of the features.
+
+        Returns:
+            the class probabilities.
+        """
+        distribution = [0.] * self.distributions.shape[1]
+        stack = [0]
+        while stack:
+            kind, feature_name, threshold, childs, lookup, node_distribution = \
+                self.descriptors[stack.pop()]
+
+            if kind != LEAF:
+                value = record.get(feature_name)
+                if is_missing(value):
+                    value = fill_values.get(feature_name)
+
+                if is_missing(value):
+                    # a sample with a missing value goes to all the children
+                    stack.extend(childs)
+                    continue
+                elif kind == NUMERICAL:
+                    stack.append(childs[1 if value > threshold else 0])
+                    continue
+                elif value in lookup:
+                    stack.append(lookup[value])
+                    continue
+
+            # leaves and nodes without a branch for the category make predictions
+            for i, count in enumerate(node_distribution):
+                distribution[i] += count
+
+        total = sum(distribution)
+
+        return [count / total for count in distribution]
+
+    def predict_proba(self, X: pd.DataFrame, fill_values: dict, backend) -> np.ndarray:
+        """
+        Routes all the samples through the tree with the traversal kernel of the
+        backend.
+
+        A sample with a missing value of the split feature goes to all the children
+        of the node, its prediction is the sum of the class distributions of all the
+        reached leaves, which is the weighted mean of the child predictions.
+
+        Parameters:
+            X: the samples.
+            fill_values: the values that replace the missing values of the features.
+            backend: the backend with the traversal kernel.
+        """
+        distributions = backend.traverse(self, self.encode(X, fill_values))
+
+        return distributions / distributions.sum(axis=1, keepdims=True)
+
+
+def is_missing(value) -> bool:
+    """Checks if a value of a single record is missing: None or NaN."""
+    # NaN is the only value not equal to itself
+    return value is None or value != value
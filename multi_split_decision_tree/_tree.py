@@ -1,7 +1,11 @@
 """Custom realization of Decision Tree which can handle categorical features."""
-import bisect
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import heapq
+from itertools import compress
 import logging
 import math
+import os
 from typing import Literal
 
 from graphviz import Digraph
@@ -9,9 +13,21 @@ import numpy as np
 import pandas as pd
 from sklearn.metrics import accuracy_score
 
-from multi_split_decision_tree._tree_node import TreeNode
+from multi_split_decision_tree._backends import get_backend
+from multi_split_decision_tree._dataset import (
+    MAX_BIN_SAMPLES,
+    MultiSplitDataset,
+    iter_batches,
+    open_dataset,
+)
+from multi_split_decision_tree._flat_tree import FlatTree
+from multi_split_decision_tree._tree_node import NodeStatistics, Split, TreeNode
 from multi_split_decision_tree._utils import (
-    cat_partitions, get_thresholds, rank_partitions
+    agglomerative_partitions,
+    exact_partitions,
+    get_bin_thresholds,
+    moving_average,
+    ordered_partitions,
 )
 from multi_split_decision_tree._exceptions import NotFittedError
 
@@ -83,8 +99,9 @@ class MultiSplitDecisionTreeClassifier:
             The mode of handling missing values in a numerical feature.
 
             - If 'include': While training samples with missing values are
-              included into all child nodes. While predicting decision is
-              weighted mean of all decisions in child nodes.
+              included into all child nodes with fractional weights
+              proportional to the child node sizes. While predicting decision
+              is weighted mean of all decisions in child nodes.
             - If 'min', missing values are filled with minimum value of
               a numerical feature in training data.
             - If 'max', missing values are filled with maximum value of
@@ -94,8 +111,9 @@ class MultiSplitDecisionTreeClassifier:
             The mode of handling missing values in a categorical feature.
 
             - If 'include': While training samples with missing values are
-              included into all child nodes. While predicting decision is
-              weighted mean of all decisions in child nodes.
+              included into all child nodes with fractional weights
+              proportional to the child node sizes. While predicting decision
+              is weighted mean of all decisions in child nodes.
             - If 'as_category': While training and predicting missing values
               will be filled with `categorical_nan_filler`.
 
@@ -104,6 +122,83 @@ class MultiSplitDecisionTreeClassifier:
             training and predicting missing values will be filled with
             `categorical_nan_filler`.
 
+        categorical_split_mode: Literal['exhaustive', 'greedy'], default='exhaustive'
+            The mode of searching for the best split by a categorical feature.
+
+            - If 'exhaustive': the best of all the partitions of the feature values
+              into at most `max_childs` groups is found. While there are few of them
+              they are scored at once from a cached table, otherwise by branch and
+              bound. Their number grows as the Bell number of the number of values,
+              the search prunes most of them, but in the worst case it's only
+              feasible for features with a few dozen values.
+            - If 'greedy': at most one partition for each number of child nodes is
+              evaluated. For a binary target the values are ordered by the class
+              probability and the best partitions into contiguous groups are found
+              by dynamic programming, which is optimal (Breiman's trick). For
+              a multiclass target the values are merged agglomeratively, starting
+              from one group per value. Usable for features with hundreds of values.
+
+        max_bins: int, default=None
+            If set, numerical features are binned once at the start of training into
+            at most `max_bins` quantile bins, and split thresholds are searched only
+            between the bins using the class histograms of the nodes. Much faster
+            for high-cardinality numerical features. If None, all the thresholds
+            between the distinct values are searched (`fit_from_dataset` always bins
+            the numerical features, into 255 bins by default).
+
+        n_jobs: int, default=None
+            The number of threads evaluating the features in parallel while searching
+            for the best split. None means 1, -1 means using all processors, -2 all
+            processors but one, etc.
+
+        growth: Literal['best_first', 'depthwise'], default='best_first'
+            The order of splitting the nodes.
+
+            - If 'best_first': the leaf with the largest information gain is split
+              next, each split scans the samples of its node.
+            - If 'depthwise': all the leaves of a depth are split together, the class
+              histograms of all the features in all of them are accumulated in a single
+              pass over the data, so the number of passes is the depth of the tree. The
+              numerical features are binned, into `max_bins` bins or 255 if it's not
+              set. With `max_leaf_nodes` the leaves of a depth are split in the order
+              of information gain while the limit allows, a leaf whose best split has
+              too many child nodes is searched again with the remaining leaves.
+
+        max_features: int, float or Literal['sqrt', 'log2'], default=None
+            The number of features to consider when looking for the best split,
+            drawn at random for each node among the features available in it
+            (see `hierarchy`):
+
+            - If int, then consider `max_features` features.
+            - If float, then `max_features` is a fraction and
+              `max(1, int(max_features * n_features))` features are considered.
+            - If 'sqrt', then `max(1, int(sqrt(n_features)))` features.
+            - If 'log2', then `max(1, int(log2(n_features)))` features.
+            - If None, then all the available features.
+
+            If none of the drawn features gives a valid split, the rest of the
+            available features are evaluated as well.
+
+        max_samples_per_split: int, default=None
+            If set, the best split of a node with more samples is searched on
+            a random subsample of `max_samples_per_split` of them, then all the
+            samples of the node are partitioned by the found split. The class
+            histograms of the binned numerical features are exact anyway. Only for
+            `growth='best_first'`, the level-wise growth always uses histograms.
+
+        random_state: int, default=None
+            Seed of the random choice of features and samples by `max_features` and
+            `max_samples_per_split`.
+
+        backend: Literal['auto', 'numpy', 'numba'], default='auto'
+            The implementation of the kernels of the split search and prediction: the
+            impurity, the sweep over the sorted samples, the class histograms, the
+            scoring of the categorical partitions and the traversal of the tree.
+
+            - If 'numpy': vectorised NumPy.
+            - If 'numba': loops compiled by Numba, which must be installed.
+            - If 'auto': 'numba' if it's installed, else 'numpy'.
+
         verbose: Literal['critical', 'error', 'warning', 'info', 'debug'] or int, default=2
             Controls the level of decision tree verbosity.
 
@@ -138,6 +233,14 @@ class MultiSplitDecisionTreeClassifier:
         numerical_nan_mode,
         categorical_nan_mode,
         categorical_nan_filler,
+        categorical_split_mode,
+        max_bins,
+        n_jobs,
+        growth,
+        max_features,
+        max_samples_per_split,
+        random_state,
+        backend,
         verbose,
     ):
         if criterion not in ["entropy", "gini", "log_loss"]:
@@ -314,6 +417,70 @@ class MultiSplitDecisionTreeClassifier:
                 f" The current value of `categorical_nan_filler` is {categorical_nan_filler!r}."
             )
 
+        if categorical_split_mode not in ["exhaustive", "greedy"]:
+            raise ValueError(
+                "`categorical_split_mode` must be Literal['exhaustive', 'greedy']."
+                f" The current value of `categorical_split_mode` is {categorical_split_mode!r}."
+            )
+
+        if max_bins is not None:
+            if not isinstance(max_bins, int) or max_bins < 2 or max_bins > 65535:
+                raise ValueError(
+                    "`max_bins` must be an integer and lie in the range [2, 65535]."
+                    f" The current value of `max_bins` is {max_bins!r}."
+                )
+
+        if n_jobs is not None:
+            if not isinstance(n_jobs, int) or n_jobs == 0:
+                raise ValueError(
+                    "`n_jobs` must be a non-zero integer."
+                    f" The current value of `n_jobs` is {n_jobs!r}."
+                )
+
+        if growth not in ["best_first", "depthwise"]:
+            raise ValueError(
+                "`growth` must be Literal['best_first', 'depthwise']."
+                f" The current value of `growth` is {growth!r}."
+            )
+
+        if max_features is not None:
+            if (
+                not isinstance(max_features, (int, float, str))
+                or (isinstance(max_features, int) and max_features < 1)
+                or (
+                    isinstance(max_features, float)
+                    and (max_features <= 0 or max_features > 1)
+                )
+                or (isinstance(max_features, str) and max_features not in ["sqrt", "log2"])
+            ):
+                raise ValueError(
+                    "`max_features` must be an integer strictly greater than 0, a float"
+                    " in the range (0, 1] or Literal['sqrt', 'log2']."
+                    f" The current value of `max_features` is {max_features!r}."
+                )
+
+        if max_samples_per_split is not None:
+            if not isinstance(max_samples_per_split, int) or max_samples_per_split < 2:
+                raise ValueError(
+                    "`max_samples_per_split` must be an integer and strictly greater"
+                    " than 1."
+                    f" The current value of `max_samples_per_split` is"
+                    f" {max_samples_per_split!r}."
+                )
+
+        if random_state is not None:
+            if not isinstance(random_state, int) or random_state < 0:
+                raise ValueError(
+                    "`random_state` must be a non-negative integer."
+                    f" The current value of `random_state` is {random_state!r}."
+                )
+
+        if backend not in ["auto", "numpy", "numba"]:
+            raise ValueError(
+                "`backend` must be Literal['auto', 'numpy', 'numba']."
+                f" The current value of `backend` is {backend!r}."
+            )
+
         if (
             not isinstance(verbose, (str, int))
             or (
@@ -344,6 +511,14 @@ class MultiSplitDecisionTreeClassifier:
         numerical_nan_mode: Literal["include", "min", "max"] = "min",
         categorical_nan_mode: Literal["include", "as_category"] = "include",
         categorical_nan_filler: str = "missing_value",
+        categorical_split_mode: Literal["exhaustive", "greedy"] = "exhaustive",
+        max_bins: int | None = None,
+        n_jobs: int | None = None,
+        growth: Literal["best_first", "depthwise"] = "best_first",
+        max_features: int | float | Literal["sqrt", "log2"] | None = None,
+        max_samples_per_split: int | None = None,
+        random_state: int | None = None,
+        backend: Literal["auto", "numpy", "numba"] = "auto",
         verbose: Literal["critical", "error", "warning", "info", "debug"] | int = 2,
     ) -> None:
         self.__check_init_params(
@@ -361,6 +536,14 @@ class MultiSplitDecisionTreeClassifier:
             numerical_nan_mode,
             categorical_nan_mode,
             categorical_nan_filler,
+            categorical_split_mode,
+            max_bins,
+            n_jobs,
+            growth,
+            max_features,
+            max_samples_per_split,
+            random_state,
+            backend,
             verbose,
         )
         match verbose:
@@ -389,12 +572,7 @@ class MultiSplitDecisionTreeClassifier:
         logging.basicConfig(level=logging_level)
 
         self.__criterion = criterion
-
-        match criterion:
-            case "gini":
-                self.__impurity = self.__gini_index
-            case "entropy" | "log_loss":
-                self.__impurity = self.__entropy
+        self.__backend = backend
 
         # criteria for stopping branching
         self.__max_depth = max_depth
@@ -407,6 +585,8 @@ class MultiSplitDecisionTreeClassifier:
 
         # attributes that are open for reading
         self.__root = None
+        self.__flat_tree = None
+        self.__fill_values = {}
         self.__graph = None
         self.__class_names = None
         self.__feature_names = None
@@ -446,6 +626,16 @@ class MultiSplitDecisionTreeClassifier:
         self.__fill_numerical_nan_values = {}
         self.__categorical_nan_mode = categorical_nan_mode
         self.__categorical_nan_filler = categorical_nan_filler
+        self.__categorical_split_mode = categorical_split_mode
+
+        self.__max_bins = max_bins
+        self.__bin_thresholds = {}
+        self.__n_jobs = n_jobs
+        self.__growth = growth
+        self.__executor = None
+        self.__max_features = max_features
+        self.__max_samples_per_split = max_samples_per_split
+        self.__random_state = random_state
 
         self.__is_fitted = False
 
@@ -484,6 +674,22 @@ class MultiSplitDecisionTreeClassifier:
             repr_.append(f"categorical_nan_mode={self.__categorical_nan_mode!r}")
         if self.__categorical_nan_filler != "missing_value":
             repr_.append(f"categorical_nan_filler={self.__categorical_nan_filler!r}")
+        if self.__categorical_split_mode != "exhaustive":
+            repr_.append(f"categorical_split_mode={self.__categorical_split_mode!r}")
+        if self.__max_bins:
+            repr_.append(f"max_bins={self.__max_bins}")
+        if self.__n_jobs:
+            repr_.append(f"n_jobs={self.__n_jobs}")
+        if self.__growth != "best_first":
+            repr_.append(f"growth={self.__growth!r}")
+        if self.__max_features is not None:
+            repr_.append(f"max_features={self.__max_features!r}")
+        if self.__max_samples_per_split:
+            repr_.append(f"max_samples_per_split={self.__max_samples_per_split}")
+        if self.__random_state is not None:
+            repr_.append(f"random_state={self.__random_state}")
+        if self.__backend != "auto":
+            repr_.append(f"backend={self.__backend!r}")
 
         return (
             f"{self.__class__.__name__}({', '.join(repr_)})"
@@ -551,57 +757,472 @@ class MultiSplitDecisionTreeClassifier:
         if X.shape[0] != y.shape[0]:
             raise ValueError("X and y must be the equal length.")
 
+        self.__check_feature_names(X.columns)
+
+    def __check_sample_weight(
+        self,
+        sample_weight,
+        n_samples: int,
+        check_sum: bool = True,
+    ) -> np.ndarray:
+        """
+        Checks the sample weights, equal weights are ones. The sum isn't checked for
+        a batch of a dataset, only the total weight of the dataset must be positive.
+        """
+        if sample_weight is None:
+            return np.ones(n_samples)
+
+        sample_weight = np.asarray(sample_weight, dtype=np.float64)
+        if sample_weight.ndim != 1:
+            raise ValueError("sample_weight must be a one-dimensional array.")
+
+        if sample_weight.shape[0] != n_samples:
+            raise ValueError("X and sample_weight must be the equal length.")
+
+        if not np.isfinite(sample_weight).all() or (sample_weight < 0).any():
+            raise ValueError("sample_weight must contain non-negative finite numbers.")
+
+        if check_sum and not sample_weight.sum() > 0:
+            raise ValueError("sample_weight must have a positive sum.")
+
+        return sample_weight
+
+    def __check_feature_names(self, columns):
         for num_feature_name in self.numerical_feature_names:
-            if num_feature_name not in X.columns:
+            if num_feature_name not in columns:
                 raise ValueError(
                     f"`numerical_feature_names` contain feature {num_feature_name},"
                     " which isnt present in the training data."
                 )
 
         for cat_feature_name in self.categorical_feature_names:
-            if cat_feature_name not in X.columns:
+            if cat_feature_name not in columns:
                 raise ValueError(
                     f"`categorical_feature_names` contain feature {cat_feature_name},"
                     " which isnt present in the training data."
                 )
 
         for rank_feature_name in self.rank_feature_names.keys():
-            if rank_feature_name not in X.columns:
+            if rank_feature_name not in columns:
                 raise ValueError(
                     f"`rank_feature_names` contain feature {rank_feature_name},"
                     " which isnt present in the training data."
                 )
 
-    def fit(self, X: pd.DataFrame, y: pd.Series) -> None:
+    def fit(
+        self,
+        X: pd.DataFrame | MultiSplitDataset,
+        y: pd.Series | None = None,
+        sample_weight: np.ndarray | pd.Series | None = None,
+    ) -> None:
         """
         Build a decision tree classifier from the training set (X, y).
 
+        With `sample_weight` all the class counts are sums of the sample weights:
+        `samples` and `distribution` of the nodes, the information gains and the
+        limits `min_samples_split` and `min_samples_leaf` (fractions of the total
+        weight, if float).
+
+        Parameters:
+            X: The training input samples, or the dataset preprocessed by
+              `make_dataset`.
+            y: The target values, None if X is a dataset.
+            sample_weight: Non-negative weights of the samples, in the order of the
+              rows of X. If None, then samples are equally weighted.
+        """
+        if isinstance(X, MultiSplitDataset):
+            self.__sample_weight = self.__check_sample_weight(sample_weight, len(X))
+            self.__use_dataset(X, y)
+        else:
+            self.__check_fit_data(X, y)
+            self.__sample_weight = self.__check_sample_weight(sample_weight, len(X))
+            self.__prepare_training_data(X, y)
+            if self.__max_bins or self.__growth == "depthwise":
+                # numerical features are binned once, the nodes keep class histograms
+                # of the bins
+                self.__bin_numerical_features(self.__max_bins or 255)
+
+        self.__node_counter = 0
+        self.__rng = np.random.default_rng(self.__random_state)
+        # the backend and the criterion may be changed by `set_params` before a fit
+        self.__kernels = get_backend(self.__backend)
+        self.__impurity = self.__kernels.impurity(self.__criterion)
+        if self.__growth == "depthwise":
+            self.__root = self.__create_node(
+                class_counts=np.bincount(
+                    self.__y_encoded,
+                    self.__sample_weight,
+                    minlength=len(self.__class_names),
+                ),
+                **self.__root_feature_names(),
+                depth=0,
+            )
+            # the whole training set is a single batch of histogram rows
+            rows = self.__binned_features.copy()
+            for feature_name in (
+                self.__categorical_feature_names + list(self.__rank_feature_names)
+            ):
+                rows[feature_name] = self.__columns[feature_name]
+            self.__grow_in_threads(
+                self.__grow_level_wise,
+                lambda: iter([(rows, self.__y_encoded, self.__sample_weight)]),
+                True,
+            )
+        else:
+            # each node owns a slice of the sample permutation, the samples shared
+            # between the children of a split are kept in side lists of the children
+            # (see `__split_samples`)
+            self.__order = np.arange(self.__n_samples, dtype=np.int32)
+            # the weights of the samples of the node being evaluated, by sample index
+            self.__row_weights = self.__sample_weight.copy()
+            # numerical features which are not binned are sorted once, the slice of
+            # a node in each order keeps the node samples sorted (missing values go last)
+            self.__sorted_orders = {
+                num_feature_name: (
+                    self.__columns[num_feature_name]
+                    .argsort(kind="stable").astype(np.int32)
+                )
+                for num_feature_name in self.__numerical_feature_names
+                if num_feature_name not in self.__binned_features
+            }
+            self.__partition_keys = np.empty(self.__n_samples, dtype=np.int32)
+            # the samples of the node being evaluated, by sample index
+            self.__is_evaluated = np.zeros(self.__n_samples, dtype=bool)
+
+            self.__root = self.__create_node(
+                class_counts=self.__class_counts(self.__order, self.__sample_weight),
+                **self.__root_feature_names(),
+                depth=0,
+                sample_indexes=slice(0, self.__n_samples),
+                shared_samples=(np.empty(0, dtype=np.int32), np.empty(0)),
+                histograms=self.__histograms(self.__order, self.__sample_weight),
+            )
+
+            self.__grow_in_threads(self.__grow)
+            del self.__order, self.__row_weights, self.__sorted_orders
+            del self.__partition_keys, self.__is_evaluated
+
+        del self.__columns
+        del self.__binned_features
+        del self.__y_encoded
+        del self.__sample_weight
+
+        self.__compile_prediction()
+
+        self.__is_fitted = True
+
+    def __prepare_training_data(self, X: pd.DataFrame, y: pd.Series) -> None:
+        """
+        Detects the features, encodes the target and converts the features into
+        columns, filling the missing values.
+        """
+        self.__set_feature_names(X)
+        self.__class_names = sorted(y.unique())
+        # label-encoded target for the class-count sweeps
+        self.__y_encoded = pd.Index(self.__class_names).get_indexer(y)
+        self.__set_n_samples(X.shape[0], self.__sample_weight.sum())
+
+        match self.__numerical_nan_mode:
+            case "min":
+                for num_feature in self.__numerical_feature_names:
+                    fill_nan_value = X[num_feature].min()
+                    self.__fill_numerical_nan_values[num_feature] = fill_nan_value
+            case "max":
+                for num_feature_name in self.__numerical_feature_names:
+                    fill_nan_value = X[num_feature_name].max()
+                    self.__fill_numerical_nan_values[num_feature_name] = fill_nan_value
+
+        self.__columns = self.__columnar_features(X)
+        self.__bin_thresholds = {}
+        self.__binned_features = {}
+
+    def make_dataset(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        path: str | os.PathLike | None = None,
+    ) -> MultiSplitDataset:
+        """
+        Preprocesses the training set (X, y) once for many fits, e.g. with different
+        hyperparameters.
+
+        The features are detected, the missing values are filled and the numerical
+        features are binned into `max_bins` bins, or 255 if it's not set, as `fit`
+        would do. The binned features are written to `path` as memory-mapped arrays
+        shared read-only by all the processes using the dataset, or kept in memory if
+        `path` is None.
+
+        The dataset can be passed to `fit` of any estimator with the same missing
+        values handling and bins. The estimator itself isn't changed.
+
         Parameters:
             X: The training input samples.
             y: The target values.
+            path: directory to save the dataset to.
+
+        Returns:
+            The preprocessed dataset.
         """
+        # the training data is prepared by an unfitted copy of the estimator, which
+        # detects the features and converts the fractions of samples in place
+        builder = type(self)(**copy.deepcopy(self.get_params()))
+
+        return builder.__build_dataset(X, y, path)
+
+    def __build_dataset(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        path: str | os.PathLike | None,
+    ) -> MultiSplitDataset:
+        """Preprocesses the training set into a dataset, see `make_dataset`."""
         self.__check_fit_data(X, y)
+        # the weights are given to `fit` with the dataset
+        self.__sample_weight = self.__check_sample_weight(None, len(X))
+        self.__prepare_training_data(X, y)
+        max_bins = self.__max_bins or 255
+        self.__bin_numerical_features(max_bins)
+
+        # the features of unsupported dtypes are not stored
+        feature_names = [
+            feature_name
+            for feature_name in self.__feature_names
+            if feature_name in self.__columns or feature_name in self.__binned_features
+        ]
+        metadata = dict(
+            feature_names=self.__feature_names,
+            numerical_feature_names=self.__numerical_feature_names.copy(),
+            categorical_feature_names=self.__categorical_feature_names.copy(),
+            rank_feature_names=self.__rank_feature_names.copy(),
+            class_names=self.__class_names,
+            numerical_nan_mode=self.__numerical_nan_mode,
+            fill_numerical_nan_values=self.__fill_numerical_nan_values.copy(),
+            categorical_nan_mode=self.__categorical_nan_mode,
+            categorical_nan_filler=self.__categorical_nan_filler,
+            categories=self.__categories,
+            max_bins=max_bins,
+            bin_thresholds=self.__bin_thresholds,
+        )
+        n_rows = max(
+            [self.__n_histogram_rows(feature_name) for feature_name in feature_names],
+            default=0,
+        )
+        dataset = MultiSplitDataset.create(
+            metadata,
+            feature_names,
+            self.__n_samples,
+            np.uint16 if n_rows <= 65536 else np.int32,
+            path,
+        )
+        for i, feature_name in enumerate(feature_names):
+            if feature_name in self.__binned_features:
+                dataset.features[i] = self.__binned_features[feature_name]
+            else:
+                dataset.features[i] = self.__columns[feature_name]
+        dataset.target[:] = self.__y_encoded
 
-        # until the end of the training, we encapsulate X and y
-        self.X = X.copy()
-        self.y = y.copy()
-        # technical attribute
-        self.splittable_leaf_nodes = []
+        del self.__columns
+        del self.__binned_features
+        del self.__y_encoded
+        del self.__sample_weight
 
-        self.__feature_names = X.columns.tolist()
-        self.__class_names = sorted(y.unique())
+        return dataset.flush()
 
-        if isinstance(self.__min_samples_split, float):
-            self.__min_samples_split = math.ceil(self.__min_samples_split * X.shape[0])
-        if isinstance(self.__min_samples_leaf, float):
-            self.__min_samples_leaf = math.ceil(self.__min_samples_leaf * X.shape[0])
+    def __use_dataset(self, dataset: MultiSplitDataset, y) -> None:
+        """
+        Takes the features and the preprocessing from the dataset after checking that
+        they agree with the parameters of the estimator.
+        """
+        if y is not None:
+            raise ValueError("y must be None if X is a MultiSplitDataset.")
+
+        metadata = dataset.metadata
+        for param, value in [
+            ("numerical_nan_mode", self.__numerical_nan_mode),
+            ("categorical_nan_mode", self.__categorical_nan_mode),
+            ("categorical_nan_filler", self.__categorical_nan_filler),
+            ("max_bins", self.__max_bins or metadata["max_bins"]),
+        ]:
+            if value != metadata[param]:
+                raise ValueError(
+                    f"`{param}` is {value!r}, but the dataset was made with"
+                    f" `{param}`={metadata[param]!r}."
+                )
+
+        for param, feature_names, dataset_feature_names in [
+            (
+                "numerical_feature_names",
+                self.__numerical_feature_names,
+                metadata["numerical_feature_names"],
+            ),
+            (
+                "categorical_feature_names",
+                self.__categorical_feature_names,
+                metadata["categorical_feature_names"],
+            ),
+        ]:
+            for feature_name in feature_names:
+                if feature_name not in dataset_feature_names:
+                    raise ValueError(
+                        f"`{param}` contain feature {feature_name}, which isnt present"
+                        f" in `{param}` of the dataset."
+                    )
+            feature_names.extend(
+                feature_name
+                for feature_name in dataset_feature_names
+                if feature_name not in feature_names
+            )
+
+        if not self.__rank_feature_names:
+            self.__rank_feature_names = metadata["rank_feature_names"].copy()
+        elif self.__rank_feature_names != metadata["rank_feature_names"]:
+            raise ValueError(
+                "`rank_feature_names` differ from `rank_feature_names` of the dataset.")
+
+        self.__feature_names = metadata["feature_names"].copy()
+        self.__feature_importances = dict.fromkeys(self.__feature_names, 0)
+        self.__class_names = metadata["class_names"]
+        self.__fill_numerical_nan_values = metadata["fill_numerical_nan_values"].copy()
+        self.__categories = metadata["categories"]
+        self.__bin_thresholds = metadata["bin_thresholds"]
+        self.__set_n_samples(len(dataset), self.__sample_weight.sum())
+
+        self.__y_encoded = dataset.target
+        self.__columns = {}
+        self.__binned_features = {}
+        for feature_name in dataset.feature_names:
+            if feature_name in self.__bin_thresholds:
+                self.__binned_features[feature_name] = dataset[feature_name]
+            else:
+                self.__columns[feature_name] = dataset[feature_name]
+
+    def fit_from_dataset(
+        self,
+        source: str | os.PathLike | list[str | os.PathLike],
+        target_name: str,
+        *,
+        format: Literal["parquet", "arrow"] = "parquet",
+        batch_size: int = 65536,
+        sample_weight_name: str | None = None,
+    ) -> None:
+        """
+        Build a decision tree classifier from a Parquet or Arrow IPC dataset, which
+        doesn't have to fit in memory.
+
+        The dataset is read in batches of rows. The first pass collects the classes,
+        the categories and a sample of the numerical values for the bin thresholds:
+        numerical features are always binned, into `max_bins` bins or 255 if it's not
+        set. Then the tree is grown level by level with a single pass over the dataset
+        per level. No state of the rows is kept between the passes: each batch is
+        routed from the root through the splits of the previous levels, and only the
+        class histograms of the nodes of the current level are kept in memory. With
+        unlimited `max_leaf_nodes` the tree is the same as the one built by `fit` with
+        the same bins.
+
+        Requires pyarrow.
+
+        Parameters:
+            source: path to a file or a directory of files, or list of paths to files.
+            target_name: the name of the target column.
+            format: the format of the files, Parquet or Arrow IPC (Feather V2).
+            batch_size: the maximum number of rows read at once.
+            sample_weight_name: the name of the column of the non-negative sample
+              weights, see `fit`. If None, then samples are equally weighted.
+        """
+        if not isinstance(target_name, str):
+            raise ValueError(
+                "`target_name` must be a string."
+                f" The current value of `target_name` is {target_name!r}."
+            )
+        if format not in ["parquet", "arrow"]:
+            raise ValueError(
+                "`format` must be Literal['parquet', 'arrow']."
+                f" The current value of `format` is {format!r}."
+            )
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError(
+                "`batch_size` must be a positive integer."
+                f" The current value of `batch_size` is {batch_size!r}."
+            )
+        if sample_weight_name is not None and not isinstance(sample_weight_name, str):
+            raise ValueError(
+                "`sample_weight_name` must be a string or None."
+                f" The current value of `sample_weight_name` is {sample_weight_name!r}."
+            )
+
+        dataset = open_dataset(source, format)
+        # an empty frame with the schema, the features are detected by its dtypes
+        X_empty = dataset.schema.empty_table().to_pandas()
+        if target_name not in X_empty.columns:
+            raise ValueError(
+                f"The target column {target_name} isnt present in the dataset.")
+        X_empty = X_empty.drop(columns=target_name)
+        service_names = [target_name]
+        if sample_weight_name is not None:
+            if sample_weight_name not in X_empty.columns:
+                raise ValueError(
+                    f"The sample weight column {sample_weight_name} isnt present in"
+                    " the dataset."
+                )
+            X_empty = X_empty.drop(columns=sample_weight_name)
+            service_names.append(sample_weight_name)
+        self.__check_feature_names(X_empty.columns)
+
+        def batches():
+            return iter_batches(dataset, X_empty.columns.tolist() + service_names, batch_size)
+
+        def batch_weights(batch):
+            if sample_weight_name is None:
+                return np.ones(len(batch))
+            return self.__check_sample_weight(
+                batch[sample_weight_name].to_numpy(dtype=np.float64),
+                len(batch),
+                check_sum=False,
+            )
+
+        self.__set_feature_names(X_empty)
+        class_counts = self.__scan_statistics(
+            batches, target_name, batch_weights, dataset.count_rows())
+
+        def scan():
+            class_names = pd.Index(self.__class_names)
+            for batch in batches():
+                yield (
+                    self.__histogram_rows(batch),
+                    class_names.get_indexer(batch[target_name]),
+                    batch_weights(batch),
+                )
+
+        self.__node_counter = 0
+        self.__rng = np.random.default_rng(self.__random_state)
+        # the backend and the criterion may be changed by `set_params` before a fit
+        self.__kernels = get_backend(self.__backend)
+        self.__impurity = self.__kernels.impurity(self.__criterion)
+        self.__root = self.__create_node(
+            class_counts=class_counts,
+            **self.__root_feature_names(),
+            depth=0,
+        )
+
+        self.__grow_in_threads(self.__grow_level_wise, scan)
+
+        self.__compile_prediction()
+
+        self.__is_fitted = True
+
+    def __set_feature_names(self, X: pd.DataFrame) -> None:
+        """
+        Sets the feature names of the training data, the features which kinds are not
+        set explicitly are detected by dtypes.
+        """
+        self.__feature_names = X.columns.tolist()
 
         # initialize feature_importances with all the features and the default value of 0
         for feature_name in self.__feature_names:
             self.__feature_importances[feature_name] = 0
 
         # numerical_feature_names and categorical_feature_names extensions ##############
-        unsetted_features_set = set(self.X.columns) - (
+        unsetted_features_set = set(X.columns) - (
             set(self.__numerical_feature_names) |
             set(self.__categorical_feature_names) |
             set(self.__rank_feature_names)
@@ -609,7 +1230,7 @@ class MultiSplitDecisionTreeClassifier:
 
         if unsetted_features_set:
             unsetted_num_features = (
-                self.X[list(unsetted_features_set)]
+                X[list(unsetted_features_set)]
                 .select_dtypes("number").columns.tolist()
             )
             if unsetted_num_features:
@@ -619,7 +1240,7 @@ class MultiSplitDecisionTreeClassifier:
                     " to `numerical_feature_names`."
                 )
             unsetted_cat_features = (
-                self.X[list(unsetted_features_set)]
+                X[list(unsetted_features_set)]
                 .select_dtypes(include=["category", "object"]).columns.tolist()
             )
             if unsetted_cat_features:
@@ -630,24 +1251,28 @@ class MultiSplitDecisionTreeClassifier:
                 )
         ################################################################################
 
-        match self.__numerical_nan_mode:
-            case "min":
-                for num_feature in self.__numerical_feature_names:
-                    fill_nan_value = X[num_feature].min()
-                    self.__fill_numerical_nan_values[num_feature] = fill_nan_value
-                    X[num_feature].fillna(fill_nan_value, inplace=True)
-            case "max":
-                for num_feature_name in self.__numerical_feature_names:
-                    fill_nan_value = X[num_feature_name].max()
-                    self.__fill_numerical_nan_values[fill_nan_value] = fill_nan_value
-                    X[num_feature_name].fillna(fill_nan_value, inplace=True)
-
-        if self.__categorical_nan_mode == "as_category":
-            for cat_feature in self.__categorical_feature_names:
-                X[cat_feature].fillna(self.__categorical_nan_filler, inplace=True)
+    def __set_n_samples(self, n_samples: int, total_weight: float) -> None:
+        """
+        Sets the number and the total weight of the training samples, the fractions
+        `min_samples_split` and `min_samples_leaf` are converted to the weights of
+        samples.
+        """
+        self.__n_samples = n_samples
+        self.__total_weight = float(total_weight)
+        if isinstance(self.__min_samples_split, float):
+            self.__min_samples_split = math.ceil(
+                self.__min_samples_split * self.__total_weight)
+        if isinstance(self.__min_samples_leaf, float):
+            self.__min_samples_leaf = math.ceil(
+                self.__min_samples_leaf * self.__total_weight)
 
+    def __root_feature_names(self) -> dict:
+        """
+        Returns the hierarchy and the features available in the root, the features
+        opened by others are removed until their opening features are split.
+        """
         hierarchy = self.__hierarchy.copy()
-        available_feature_names = X.columns.tolist()
+        available_feature_names = self.__feature_names.copy()
         # remove those features that cannot be considered yet
         for value in hierarchy.values():
             if isinstance(value, str):
@@ -658,286 +1283,1430 @@ class MultiSplitDecisionTreeClassifier:
             else:
                 assert False
 
-        root_mask = y.apply(lambda x: True)
-        self.__root = self.__create_node(
-            mask=root_mask,
-            hierarchy=hierarchy,
-            available_feature_names=available_feature_names,
-            depth=0,
-        )
+        return dict(hierarchy=hierarchy, available_feature_names=available_feature_names)
 
-        if self.__is_splittable(self.__root):
-            self.splittable_leaf_nodes.append(self.__root)
+    def __scan_statistics(
+        self,
+        batches,
+        target_name: str,
+        batch_weights,
+        n_rows: int,
+    ) -> np.ndarray:
+        """
+        Collects in a single pass over the dataset everything needed before growing:
+        the classes, the number and the weight of samples, the missing values fillers,
+        the categories of the categorical features and the bin thresholds of the
+        numerical features. The thresholds are found from a uniform random sample of
+        at most `MAX_BIN_SAMPLES` values of each feature.
 
-        while (
-            len(self.splittable_leaf_nodes) > 0
-            and self.__leaf_counter < self.__max_leaf_nodes
-        ):
-            best_node = self.splittable_leaf_nodes.pop()
-            (
-                inf_gain,
-                split_type,
-                split_feature_name,
-                feature_values,
-                child_masks,
-            ) = best_node._best_split
-
-            self.__feature_importances[split_feature_name] += inf_gain
-
-            for child_mask, feature_value in zip(child_masks, feature_values):
-                # add opened features
-                if split_feature_name in best_node._hierarchy:
-                    value = best_node._hierarchy.pop(split_feature_name)
-                    if isinstance(value, str):
-                        best_node._available_feature_names.append(value)
-                    elif isinstance(value, list):
-                        best_node._available_feature_names.extend(value)
-                    else:
-                        assert False
+        Returns:
+            the class counts of the dataset.
+        """
+        rng = np.random.default_rng(0)
+        sample_fraction = min(1.0, MAX_BIN_SAMPLES / max(n_rows, 1))
+
+        class_counts = {}
+        n_samples = 0
+        samples = {name: [] for name in self.__numerical_feature_names}
+        minimums = {name: float("+inf") for name in self.__numerical_feature_names}
+        maximums = {name: float("-inf") for name in self.__numerical_feature_names}
+        categories = {name: {} for name in self.__categorical_feature_names}
+        for batch in batches():
+            n_samples += len(batch)
+            class_weights = (
+                pd.Series(batch_weights(batch), index=batch.index)
+                .groupby(batch[target_name]).sum()
+            )
+            for class_name, count in class_weights.items():
+                class_counts[class_name] = class_counts.get(class_name, 0) + count
 
-                child_node = self.__create_node(
-                    mask=child_mask,
-                    hierarchy=best_node._hierarchy,
-                    available_feature_names=best_node._available_feature_names,
-                    depth=best_node._depth+1,
-                )
-                child_node.feature_value = feature_value
-                self.__leaf_counter += 1
-
-                best_node.childs.append(child_node)
-                if self.__is_splittable(child_node):
-                    bisect.insort(
-                        self.splittable_leaf_nodes,
-                        child_node,
-                        key=lambda x: x._best_split[0],
-                    )
+            if sample_fraction < 1:
+                is_sampled = rng.random(len(batch)) < sample_fraction
+            else:
+                is_sampled = slice(None)
+            for num_feature_name in self.__numerical_feature_names:
+                values = batch[num_feature_name].to_numpy(
+                    dtype=np.float64, na_value=np.nan)
+                if not np.isnan(values).all():
+                    minimums[num_feature_name] = min(
+                        minimums[num_feature_name], np.nanmin(values))
+                    maximums[num_feature_name] = max(
+                        maximums[num_feature_name], np.nanmax(values))
+                samples[num_feature_name].append(values[is_sampled])
+
+            for cat_feature_name in self.__categorical_feature_names:
+                column = batch[cat_feature_name].astype(object)
+                if self.__categorical_nan_mode == "as_category":
+                    column = column.fillna(self.__categorical_nan_filler)
+                # the categories in the order of appearance
+                categories[cat_feature_name].update(dict.fromkeys(column.dropna()))
+
+        self.__class_names = sorted(class_counts)
+        total_weight = sum(class_counts.values())
+        if not total_weight > 0:
+            raise ValueError("sample_weight must have a positive sum.")
+        self.__set_n_samples(n_samples, total_weight)
 
-            best_node.is_leaf = False
-            best_node.split_type = split_type
-            best_node.split_feature_name = split_feature_name
-            self.__leaf_counter -= 1
+        match self.__numerical_nan_mode:
+            case "min":
+                self.__fill_numerical_nan_values = minimums
+            case "max":
+                self.__fill_numerical_nan_values = maximums
 
-        del self.X
-        del self.y
-        del self.splittable_leaf_nodes
+        self.__categories = {
+            cat_feature_name: pd.Index(list(values), dtype=object)
+            for cat_feature_name, values in categories.items()
+        }
 
-        self.__is_fitted = True
+        self.__bin_thresholds = {}
+        for num_feature_name, values in samples.items():
+            values = np.concatenate(values) if values else np.empty(0)
+            if num_feature_name in self.__fill_numerical_nan_values:
+                fill_nan_value = self.__fill_numerical_nan_values[num_feature_name]
+                values = np.where(np.isnan(values), fill_nan_value, values)
+            self.__bin_thresholds[num_feature_name] = get_bin_thresholds(
+                values[~np.isnan(values)], self.__max_bins or 255)
 
-    def __is_splittable(self, node: TreeNode) -> bool:
-        """Checks whether a tree node can be split."""
-        if self.__max_depth and node._depth >= self.__max_depth:
-            return False
+        return np.array([class_counts[class_name] for class_name in self.__class_names])
 
-        if node.samples < self.__min_samples_split:
-            return False
+    def __histogram_rows(self, X: pd.DataFrame) -> dict[str, np.ndarray]:
+        """
+        Encodes the samples as the rows of the class histograms of the features: the
+        bins of the numerical features with missing values in the last row, the codes
+        of the categorical and rank features shifted by one with missing and unknown
+        values in the first row.
+        """
+        rows = {}
+        for num_feature_name in self.__numerical_feature_names:
+            values = X[num_feature_name].to_numpy(dtype=np.float64, na_value=np.nan)
+            is_na = np.isnan(values)
+            if num_feature_name in self.__fill_numerical_nan_values:
+                fill_nan_value = self.__fill_numerical_nan_values[num_feature_name]
+                values = np.where(is_na, fill_nan_value, values)
+                is_na = np.isnan(values)
+            thresholds = self.__bin_thresholds[num_feature_name]
+            codes = np.searchsorted(thresholds, values)
+            codes[is_na] = len(thresholds) + 1
+            rows[num_feature_name] = codes
+
+        for cat_feature_name in self.__categorical_feature_names:
+            column = X[cat_feature_name].astype(object)
+            if self.__categorical_nan_mode == "as_category":
+                column = column.fillna(self.__categorical_nan_filler)
+            rows[cat_feature_name] = (
+                self.__categories[cat_feature_name].get_indexer(column) + 1)
+
+        for rank_feature_name, rank_values in self.__rank_feature_names.items():
+            rows[rank_feature_name] = (
+                pd.Index(rank_values).get_indexer(X[rank_feature_name]) + 1)
+
+        return rows
+
+    def __columnar_features(self, X: pd.DataFrame) -> dict[str, np.ndarray]:
+        """
+        Converts the training samples into contiguous per-feature numpy arrays.
+
+        Numerical features keep float64 or float32 values, the columns of the input
+        DataFrame are taken without copying when possible, missing values are filled
+        according to `numerical_nan_mode`. Categorical features are replaced with int32
+        codes of the values listed in `self.__categories` (the codes of pandas
+        `category` columns are reused), rank features with int32 positions of the values
+        in the rank order. The codes are shifted by one to be the rows of the class
+        histograms, missing and unknown values get the code 0.
+        """
+        columns = {}
+        for num_feature_name in self.__numerical_feature_names:
+            values = X[num_feature_name].to_numpy()
+            if values.dtype not in (np.float32, np.float64):
+                values = X[num_feature_name].to_numpy(dtype=np.float64, na_value=np.nan)
+            if num_feature_name in self.__fill_numerical_nan_values:
+                is_na = np.isnan(values)
+                if is_na.any():
+                    fill_nan_value = self.__fill_numerical_nan_values[num_feature_name]
+                    values = np.where(is_na, values.dtype.type(fill_nan_value), values)
+            columns[num_feature_name] = values
+
+        self.__categories = {}
+        for cat_feature_name in self.__categorical_feature_names:
+            column = X[cat_feature_name]
+            if self.__categorical_nan_mode == "as_category" and column.hasnans:
+                if (
+                    isinstance(column.dtype, pd.CategoricalDtype)
+                    and self.__categorical_nan_filler not in column.cat.categories
+                ):
+                    column = column.cat.add_categories([self.__categorical_nan_filler])
+                column = column.fillna(self.__categorical_nan_filler)
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                codes = column.cat.codes.to_numpy()
+                categories = column.cat.categories
+            else:
+                codes, categories = pd.factorize(column)
+            columns[cat_feature_name] = codes.astype(np.int32) + 1
+            self.__categories[cat_feature_name] = pd.Index(categories)
+
+        for rank_feature_name, rank_values in self.__rank_feature_names.items():
+            columns[rank_feature_name] = (
+                pd.Index(rank_values).get_indexer(X[rank_feature_name]).astype(np.int32)
+                + 1
+            )
 
-        if node.impurity == 0:
-            return False
+        return columns
 
-        best_split_results = self.__find_best_split(node._mask, node._available_feature_names)
-        inf_gain = best_split_results[0]
-        if inf_gain < self.__min_impurity_decrease:
-            return False
-        else:
-            node._best_split = best_split_results
-            return True
+    def __n_threads(self) -> int:
+        """Resolves `n_jobs` to the number of threads."""
+        if self.__n_jobs is None:
+            return 1
+        if self.__n_jobs < 0:
+            return max(1, (os.cpu_count() or 1) + 1 + self.__n_jobs)
 
-    def __create_node(
-        self,
-        mask: pd.Series,
-        hierarchy: dict[str, str | list[str]],
-        available_feature_names: list[str],
-        depth: int,
-    ) -> TreeNode:
-        """Create a node of the tree."""
-        hierarchy = hierarchy.copy()
-        available_feature_names = available_feature_names.copy()
+        return self.__n_jobs
 
-        samples = mask.sum()
-        distribution = self.__distribution(mask)
-        impurity = self.__impurity(mask)
-        label = self.y[mask].value_counts().index[0]
+    def __grow_in_threads(self, grow, *args) -> None:
+        """
+        Grows the tree with `grow`, the features are evaluated by a pool of threads if
+        `n_jobs` allows.
+        """
+        n_threads = self.__n_threads()
+        if n_threads > 1:
+            self.__executor = ThreadPoolExecutor(max_workers=n_threads)
+
+        try:
+            grow(*args)
+        finally:
+            if self.__executor is not None:
+                self.__executor.shutdown()
+                self.__executor = None
+
+    def __grow(self) -> None:
+        """
+        Grows the tree from the root in best-first fashion.
 
-        tree_node = TreeNode(
-            self.__node_counter,
-            samples,
-            distribution,
-            impurity,
-            label,
-            depth,
-            mask,
-            hierarchy,
-            available_feature_names,
-        )
+        The leaves wait for splitting in a heap ordered by information gain. A new leaf
+        is pushed with the upper bound of its gain, `(N_leaf / N) * impurity`, and its
+        best split is searched for only when the leaf gets to the top of the heap. So
+        with `max_leaf_nodes` the leaves that can't beat the others are never evaluated.
+        Among equal gains the leaf created last is split first.
+        """
+        heap = []
+        self.__push_leaf(heap, self.__root)
+        self.__leaf_counter = 1
+
+        while heap and self.__leaf_counter < self.__max_leaf_nodes:
+            _, _, best_node = heapq.heappop(heap)
+
+            if best_node._best_split is None:
+                if self.__is_splittable(best_node):
+                    heapq.heappush(
+                        heap,
+                        (-best_node._best_split[0], -best_node.number, best_node),
+                    )
+                continue
 
-        self.__node_counter += 1
+            inf_gain, split, feature_values = best_node._best_split
 
-        return tree_node
+            # the leaf was evaluated with a larger budget of leaves, search again
+            if self.__leaf_counter - 1 + len(feature_values) > self.__max_leaf_nodes:
+                best_node._best_split = None
+                self.__push_leaf(heap, best_node)
+                continue
 
-    def __find_best_split(
-        self,
-        parent_mask: pd.Series,
-        available_feature_names: list[str],
-    ) -> tuple[float, str | None, str | None, list[list[str]] | None, list[pd.Series] | None]:
+            childs = self.__expand(best_node, self.__split_samples(best_node, split))
+            for child_node in childs:
+                self.__push_leaf(heap, child_node)
+
+        for _, _, node in heap:
+            self.__release(node)
+
+    def __grow_level_wise(self, scan, keep_positions: bool = False) -> None:
         """
-        Finds the best tree node split, if it exists.
+        Grows the tree from the root level by level.
 
-        Parameters:
-            parent_mask: boolean mask of the tree node.
-            available_feature_names: the list of features available for splitting.
+        The class histograms of all the features in all the nodes of a level are
+        accumulated in a single pass over the training data, so the number of passes is
+        the depth of the tree. The nodes of a level are split in the order of
+        information gain while `max_leaf_nodes` allows, as in `__grow` the best split
+        of a node is searched again if it has more child nodes than the leaves left.
 
-        Returns:
-            Tuple `(inf_gain, split_type, split_feature_name, feature_values,
-            child_masks)`.
-              inf_gain: information gain of the split.
-              split_type: split type.
-              split_feature_name: the feature by which it is best to split the input set.
-              feature_values: feature values corresponding to child nodes.
-              child_masks: list of child masks.
+        Parameters:
+            scan: function starting a pass over the training data, it returns an
+              iterator over the batches `(histogram_rows, y_encoded, sample_weight)`:
+              the histogram rows of the feature values (see `__histogram_rows`),
+              the label-encoded target and the sample weights.
+            keep_positions: whether the positions of the samples in the nodes are kept
+              between the passes, so each pass moves the samples only one level down.
+              The batches must then come in the same order in all the passes. Otherwise
+              each pass routes the batches from the root.
         """
-        best_inf_gain = float("-inf")
-        best_split_type = None
-        best_split_feature_name = None
-        best_feature_values = None
-        best_child_masks = None
-        for split_feature_name in available_feature_names:
-            if split_feature_name in self.__numerical_feature_names:
-                split_type = "numerical"
-                (
-                    inf_gain,
-                    feature_values,
-                    child_masks,
-                ) = self.__num_split(parent_mask, split_feature_name)
-            elif split_feature_name in self.__categorical_feature_names:
-                split_type = "categorical"
-                (
-                    inf_gain,
-                    feature_values,
-                    child_masks,
-                ) = self.__best_cat_split(parent_mask, split_feature_name)
-            elif split_feature_name in self.__rank_feature_names:
-                split_type = "rank"
-                (
-                    inf_gain,
-                    feature_values,
-                    child_masks,
-                ) = self.__best_rank_split(parent_mask, split_feature_name)
+        self.__leaf_counter = 1
+        level = [self.__root]
+        if not self.__is_promising(self.__root):
+            self.__release(self.__root)
+            level = []
+
+        parent_level = []
+        routers = []
+        positions = None
+        while level and self.__leaf_counter < self.__max_leaf_nodes:
+            if parent_level:
+                routers.append(self.__compile_router(parent_level, level))
+            level_histograms, positions = self.__level_histograms(
+                level, scan, routers, positions, keep_positions)
+            for node, histograms in zip(level, level_histograms):
+                node._histograms = histograms
+
+            splittable_nodes = [node for node in level if self.__is_splittable(node)]
+            # the sort is stable, among equal gains the nodes keep their order
+            splittable_nodes.sort(key=lambda node: -node._best_split[0])
+
+            next_level = []
+            for node in splittable_nodes:
+                _, split, feature_values = node._best_split
+                # the node was evaluated with a larger budget of leaves, search again
+                if self.__leaf_counter - 1 + len(feature_values) > self.__max_leaf_nodes:
+                    if self.__leaf_counter == self.__max_leaf_nodes:
+                        self.__release(node)
+                        continue
+                    node._best_split = None
+                    if not self.__is_splittable(node):
+                        continue
+                    _, split, feature_values = node._best_split
+
+                # the class counts of the child nodes are the sums of the histogram
+                # rows, the missing values are shared in proportion to the child sizes
+                lookup = self.__split_lookup(split)
+                histogram = node._histograms[split.feature_name]
+                counts_childs = np.array([
+                    histogram[lookup == i].sum(axis=0)
+                    for i in range(len(feature_values))
+                ])
+                na_counts = histogram[lookup == -2].sum(axis=0)
+                node._na_fractions = counts_childs.sum(axis=1) / counts_childs.sum()
+                counts_childs += node._na_fractions[:, np.newaxis] * na_counts
+                childs = self.__expand(
+                    node, [dict(class_counts=counts) for counts in counts_childs])
+                for child_node in childs:
+                    if self.__is_promising(child_node):
+                        next_level.append(child_node)
+                    else:
+                        self.__release(child_node)
 
-            if best_inf_gain < inf_gain:
-                best_inf_gain = inf_gain
-                best_split_type = split_type
-                best_split_feature_name = split_feature_name
-                best_feature_values = feature_values
-                best_child_masks = child_masks
+            parent_level, level = level, next_level
 
-        return (
-            best_inf_gain,
-            best_split_type,
-            best_split_feature_name,
-            best_feature_values,
-            best_child_masks,
-        )
+        for node in level:
+            self.__release(node)
 
-    def __num_split(
+    def __level_histograms(
         self,
-        parent_mask: pd.Series,
-        split_feature_name: str,
-    ) -> tuple[float, list[list[str]] | None, list[pd.Series] | None]:
+        level: list[TreeNode],
+        scan,
+        routers: list[dict[str, np.ndarray]],
+        positions: list[tuple[np.ndarray, tuple | None]] | None,
+        keep_positions: bool,
+    ) -> tuple[list[dict], list[tuple[np.ndarray, tuple | None]] | None]:
         """
-        Finds the best tree node split by set numerical feature, if it exists.
+        Builds the class histograms of all the features in all the nodes of the level
+        in a single pass over the training data, with one class histogram per feature
+        and batch.
+
+        Without `keep_positions` no state of the samples is kept between the passes,
+        each batch goes from the root through the splits of all the previous levels.
+        With it, the positions of the samples in the previous level (see `__advance`)
+        move only one level down.
 
         Parameters:
-            parent_mask: boolean mask of the tree node.
-            split_feature_name: The name of the set numerical feature by which to find
-              the best split.
+            routers: the splits of the previous levels, see `__compile_router`.
+            positions: the kept positions of the samples of each batch in the previous
+              level, None for the root or without `keep_positions`.
 
         Returns:
-            Tuple `(inf_gain, feature_values, child_masks)`.
-              inf_gain: information gain of the split.
-              feature_values: feature values corresponding to child nodes.
-              child_masks: boolean masks of child nodes.
+            Tuple `(level_histograms, level_positions)`: the histograms of each node of
+              the level and, with `keep_positions`, the positions of the samples of
+              each batch in the level.
         """
-        use_including_na = (
-            self.__numerical_nan_mode == "include"
-            # and there are samples with missing values
-            and (parent_mask & self.X[split_feature_name].isna()).sum()
+        n_classes = len(self.__class_names)
+        n_rows = {
+            feature_name: self.__n_histogram_rows(feature_name)
+            for feature_name in (
+                self.__numerical_feature_names
+                + self.__categorical_feature_names
+                + list(self.__rank_feature_names)
+            )
+        }
+
+        # a histogram of a feature is kept only for the nodes which may split on it,
+        # `node_numbers` maps the slots of the level to the nodes of the histogram
+        node_numbers = {}
+        counts = {}
+        for feature_name, n in n_rows.items():
+            is_available = np.array([
+                feature_name in node._available_feature_names for node in level])
+            node_numbers[feature_name] = np.cumsum(is_available) - 1
+            node_numbers[feature_name][~is_available] = -1
+            counts[feature_name] = np.zeros((is_available.sum(), n, n_classes))
+
+        level_positions = [] if keep_positions else None
+        for i, (rows, y_encoded, sample_weight) in enumerate(scan()):
+            if keep_positions:
+                if positions is None:
+                    batch_positions = (np.zeros(len(sample_weight), dtype=np.int32), None)
+                else:
+                    batch_positions = self.__advance(
+                        routers[-1], rows, sample_weight, positions[i])
+                level_positions.append(batch_positions)
+                row_slots, shared = batch_positions
+                samples = np.flatnonzero(row_slots >= 0)
+                slots, weights = row_slots[samples], sample_weight[samples]
+                if shared is not None:
+                    samples = np.concatenate([samples, shared[0]])
+                    slots = np.concatenate([slots, shared[1]])
+                    weights = np.concatenate([weights, shared[2]])
+            else:
+                samples = np.arange(len(sample_weight))
+                slots = np.zeros(len(sample_weight), dtype=np.intp)
+                weights = sample_weight
+                for router in routers:
+                    samples, slots, weights, _ = self.__route(
+                        router, rows, samples, slots, weights)
+
+            # the histograms of the batch cover only the nodes it reaches
+            touched_slots = np.flatnonzero(np.bincount(slots, minlength=len(level)))
+            slot_positions = np.empty(len(level), dtype=np.intp)
+            slot_positions[touched_slots] = np.arange(len(touched_slots))
+            touched_positions = slot_positions[slots]
+            y = y_encoded[samples]
+            for feature_name, feature_counts in counts.items():
+                touched_nodes = node_numbers[feature_name][touched_slots]
+                is_available = touched_nodes >= 0
+                if is_available.all():
+                    feature_samples, feature_y = samples, y
+                    feature_positions, feature_weights = touched_positions, weights
+                else:
+                    positions_map = np.cumsum(is_available) - 1
+                    is_sample_available = is_available[touched_positions]
+                    feature_samples = samples[is_sample_available]
+                    feature_y = y[is_sample_available]
+                    feature_positions = positions_map[
+                        touched_positions[is_sample_available]]
+                    feature_weights = weights[is_sample_available]
+                    touched_nodes = touched_nodes[is_available]
+
+                n = n_rows[feature_name]
+                batch_counts = self.__kernels.class_histogram(
+                    feature_positions * n + rows[feature_name][feature_samples],
+                    feature_y,
+                    feature_weights,
+                    len(touched_nodes) * n,
+                    n_classes,
+                ).reshape(len(touched_nodes), n, n_classes)
+                if len(touched_nodes) == len(feature_counts):
+                    feature_counts += batch_counts
+                else:
+                    feature_counts[touched_nodes] += batch_counts
+
+        level_histograms = [
+            {
+                feature_name: counts[feature_name][numbers[i]]
+                for feature_name, numbers in node_numbers.items()
+                if numbers[i] >= 0
+            }
+            for i in range(len(level))
+        ]
+
+        return level_histograms, level_positions
+
+    def __advance(
+        self,
+        router: dict[str, np.ndarray],
+        rows: dict[str, np.ndarray],
+        sample_weight: np.ndarray,
+        positions: tuple[np.ndarray, tuple | None],
+    ) -> tuple[np.ndarray, tuple | None]:
+        """
+        Moves the kept positions of the samples of a batch one level down.
+
+        The positions are `(row_slots, shared)`: `row_slots` is the slot of the node
+        of each sample with its full weight (-1 if it reached no node) and `shared` is
+        None or the triple `(samples, slots, weights)` of the samples which went to
+        several child nodes with a share of their weight in each of them.
+        """
+        row_slots, shared = positions
+        samples = np.flatnonzero(row_slots >= 0)
+        samples, slots, weights, is_shared = self.__route(
+            router, rows, samples, row_slots[samples], sample_weight[samples])
+
+        row_slots = np.full(len(row_slots), -1, dtype=np.int32)
+        row_slots[samples[~is_shared]] = slots[~is_shared]
+
+        shared_parts = [(samples[is_shared], slots[is_shared], weights[is_shared])]
+        if shared is not None:
+            shared_parts.append(self.__route(router, rows, *shared)[:3])
+        shared_samples, shared_slots, shared_weights = (
+            np.concatenate(part) for part in zip(*shared_parts))
+        if len(shared_samples) == 0:
+            return row_slots, None
+
+        return row_slots, (
+            shared_samples.astype(np.int32),
+            shared_slots.astype(np.int32),
+            shared_weights,
         )
 
-        if use_including_na:
-            mask_notna = parent_mask & self.X[split_feature_name].notna()
-            # if split by feature value is not possible
-            if mask_notna.sum() <= 1:
-                return float("-inf"), None, None
-            mask_na = parent_mask & self.X[split_feature_name].isna()
+    def __n_histogram_rows(self, feature_name: str) -> int:
+        """Returns the number of rows of the class histogram of the feature."""
+        if feature_name in self.__bin_thresholds:
+            return len(self.__bin_thresholds[feature_name]) + 2
+        elif feature_name in self.__categories:
+            return len(self.__categories[feature_name]) + 1
+        else:
+            return len(self.__rank_feature_names[feature_name]) + 1
 
-            points = self.X.loc[mask_notna, split_feature_name].to_numpy()
+    def __split_lookup(self, split: Split) -> np.ndarray:
+        """
+        Maps the histogram rows of the split feature to the child nodes: the number of
+        the child node, -1 if the value gets to none of them, -2 if it gets to all of
+        them (missing values in 'include' mode).
+        """
+        feature_name = split.feature_name
+        rows = np.arange(self.__n_histogram_rows(feature_name))
+        if split.split_type == "numerical":
+            # the last bin of the first child
+            last_bin = np.searchsorted(self.__bin_thresholds[feature_name], split.threshold)
+            lookup = np.where(rows <= last_bin, 0, 1)
+            lookup[-1] = -2 if self.__numerical_nan_mode == "include" else -1
+        elif split.split_type == "categorical":
+            lookup = np.full(len(rows), -1)
+            for i, categories in enumerate(split.categories):
+                lookup[self.__categories[feature_name].get_indexer(list(categories)) + 1] = i
+            lookup[0] = -2
         else:
-            points = self.X.loc[parent_mask, split_feature_name].to_numpy()
+            lookup = np.where(rows <= split.rank_cut, 0, 1)
+            lookup[0] = -1
 
-        thresholds = get_thresholds(points)
+        return lookup
 
-        best_inf_gain = float("-inf")
-        best_feature_values = None
-        best_child_masks = None
-        for threshold in thresholds:
-            mask_less = parent_mask & (self.X[split_feature_name] <= threshold)
-            mask_more = parent_mask & (self.X[split_feature_name] > threshold)
+    def __compile_router(
+        self,
+        parent_level: list[TreeNode],
+        level: list[TreeNode],
+    ) -> dict[str, np.ndarray]:
+        """
+        Compiles the splits of the nodes of the previous level into flat arrays routing
+        the samples, encoded as histogram rows, to the nodes of the level. The nodes
+        are numbered by their positions (slots) in their levels, the slot of a child
+        node which isn't in the level is -1, `na_fractions` are the shares of the child
+        nodes in the samples getting to all of them.
+        """
+        slots = {id(node): i for i, node in enumerate(level)}
+
+        feature_names = []
+        feature = np.full(len(parent_level), -1)
+        child_start = np.zeros(len(parent_level), dtype=np.intp)
+        n_childs = np.zeros(len(parent_level), dtype=np.intp)
+        lookup_start = np.zeros(len(parent_level), dtype=np.intp)
+        childs = []
+        na_fractions = []
+        lookups = []
+        n_lookups = 0
+        for i, node in enumerate(parent_level):
+            if node.is_leaf:
+                continue
+            split = node.split
+            if split.feature_name not in feature_names:
+                feature_names.append(split.feature_name)
+            feature[i] = feature_names.index(split.feature_name)
+            child_start[i] = len(childs)
+            n_childs[i] = len(node.childs)
+            childs.extend(slots.get(id(child), -1) for child in node.childs)
+            na_fractions.extend(node._na_fractions)
+            lookup_start[i] = n_lookups
+            lookups.append(self.__split_lookup(split))
+            n_lookups += len(lookups[-1])
+
+        return dict(
+            feature_names=feature_names,
+            feature=feature,
+            child_start=child_start,
+            n_childs=n_childs,
+            lookup_start=lookup_start,
+            childs=np.array(childs, dtype=np.intp),
+            na_fractions=np.array(na_fractions, dtype=np.float64),
+            lookup=np.concatenate(lookups) if lookups else np.empty(0, dtype=np.intp),
+        )
+
+    def __route(
+        self,
+        router: dict[str, np.ndarray],
+        rows: dict[str, np.ndarray],
+        samples: np.ndarray,
+        slots: np.ndarray,
+        weights: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Moves the samples of a batch from the nodes of the previous level to the nodes
+        of the level by the compiled splits. A sample with a missing value of the split
+        feature in 'include' mode goes to all the child nodes with a share of its
+        weight, so it may reach several nodes of the level. The samples getting to
+        the nodes which aren't split or to the children which aren't in the level are
+        dropped.
+
+        Parameters:
+            samples, slots, weights: the positions of the samples in the previous level.
+
+        Returns:
+            Tuple `(samples, slots, weights, is_shared)`: the sample numbers in the
+              batch, the positions of the reached nodes in the level, the weights of
+              the samples in them and whether the sample went to all the children.
+        """
+        features = router["feature"][slots]
+        is_split = features >= 0
+        samples, slots, features = samples[is_split], slots[is_split], features[is_split]
+        weights = weights[is_split]
+
+        branches = np.empty(len(samples), dtype=np.intp)
+        for j in np.unique(features):
+            is_feature = features == j
+            feature_rows = rows[router["feature_names"][j]][samples[is_feature]]
+            branches[is_feature] = router["lookup"][
+                router["lookup_start"][slots[is_feature]] + feature_rows]
+
+        is_moving = branches >= 0
+        moving_slots = router["childs"][
+            router["child_start"][slots[is_moving]] + branches[is_moving]]
+
+        # samples with missing values go to all the children
+        is_na = branches == -2
+        na_slots = slots[is_na]
+        repeats = router["n_childs"][na_slots]
+        offsets = np.arange(repeats.sum()) - np.repeat(repeats.cumsum() - repeats, repeats)
+        na_positions = np.repeat(router["child_start"][na_slots], repeats) + offsets
+
+        samples = np.concatenate([samples[is_moving], np.repeat(samples[is_na], repeats)])
+        slots = np.concatenate([moving_slots, router["childs"][na_positions]])
+        na_weights = np.repeat(weights[is_na], repeats)
+        weights = np.concatenate([
+            weights[is_moving], na_weights * router["na_fractions"][na_positions]])
+
+        is_shared = np.arange(len(slots)) >= len(moving_slots)
+        is_reached = slots >= 0
+        return (
+            samples[is_reached],
+            slots[is_reached],
+            weights[is_reached],
+            is_shared[is_reached],
+        )
+
+    def __expand(self, node: TreeNode, childs_kwargs: list[dict]) -> list[TreeNode]:
+        """
+        Splits the leaf by its best split into the child nodes created with
+        `childs_kwargs`.
+        """
+        inf_gain, split, feature_values = node._best_split
+        split_feature_name = split.feature_name
+
+        self.__feature_importances[split_feature_name] += inf_gain
+
+        # add opened features
+        if split_feature_name in node._hierarchy:
+            value = node._hierarchy.pop(split_feature_name)
+            if isinstance(value, str):
+                node._available_feature_names.append(value)
+            elif isinstance(value, list):
+                node._available_feature_names.extend(value)
+            else:
+                assert False
+
+        for kwargs, feature_value in zip(childs_kwargs, feature_values):
+            child_node = self.__create_node(
+                **kwargs,
+                hierarchy=node._hierarchy,
+                available_feature_names=node._available_feature_names,
+                depth=node._depth+1,
+            )
+            child_node.feature_value = feature_value
+            node.childs.append(child_node)
+
+        node.is_leaf = False
+        node.split_type = split.split_type
+        node.split_feature_name = split_feature_name
+        node.split = split
+        self.__release(node)
+        self.__leaf_counter += len(childs_kwargs) - 1
+
+        return node.childs
+
+    def __is_promising(self, node: TreeNode) -> bool:
+        """
+        Checks whether the leaf may be split at all, without searching for the split:
+        the information gain of a split can't exceed `(N_leaf / N) * impurity`.
+        """
+        return not (
+            (self.__max_depth and node._depth >= self.__max_depth)
+            or node.samples < self.__min_samples_split
+            or node.impurity == 0
+            or self.__upper_bound(node) < self.__min_impurity_decrease
+        )
+
+    def __upper_bound(self, node: TreeNode) -> float:
+        """The upper bound of the information gain of the leaf split."""
+        return (node.samples / self.__total_weight) * node.impurity
+
+    def __push_leaf(self, heap: list, node: TreeNode) -> None:
+        """
+        Pushes the leaf to the heap of the leaves waiting for splitting with the upper
+        bound of its information gain, unless the leaf obviously can't be split.
+        """
+        if not self.__is_promising(node):
+            self.__release(node)
+            return
+
+        heapq.heappush(heap, (-self.__upper_bound(node), -node.number, node))
+
+    def __release(self, node: TreeNode) -> None:
+        """
+        Frees the samples of the node and everything computed from them, once the node
+        is split or can't be split.
+        """
+        node._sample_indexes = None
+        node._shared_samples = None
+        node._statistics = None
+        node._histograms = None
+        node._best_split = None
+
+    def __is_splittable(self, node: TreeNode) -> bool:
+        """Checks whether a tree node can be split."""
+        if (
+            (self.__max_depth and node._depth >= self.__max_depth)
+            or node.samples < self.__min_samples_split
+            or node.impurity == 0
+        ):
+            self.__release(node)
+            return False
+
+        best_split_results = self.__find_best_split(node)
+        inf_gain = best_split_results[0]
+        if inf_gain < self.__min_impurity_decrease:
+            self.__release(node)
+            return False
+        else:
+            node._best_split = best_split_results
+            return True
+
+    def __create_node(
+        self,
+        class_counts: np.ndarray,
+        hierarchy: dict[str, str | list[str]],
+        available_feature_names: list[str],
+        depth: int,
+        sample_indexes: slice | None = None,
+        shared_samples: tuple[np.ndarray, np.ndarray] | None = None,
+        histograms: dict[str, np.ndarray] | None = None,
+    ) -> TreeNode:
+        """
+        Create a node of the tree. The samples of the node are its slice of the sample
+        permutation and its shared samples, they are not kept when the tree is grown
+        level by level.
+
+        Parameters:
+            sample_indexes: the slice of the node in the sample permutation.
+            shared_samples: the indexes and the weights of the samples with missing
+              values of the split features of the ancestors getting to the node.
+        """
+        hierarchy = hierarchy.copy()
+        available_feature_names = available_feature_names.copy()
+
+        if np.array_equal(class_counts, np.round(class_counts)):
+            class_counts = class_counts.astype(np.int64)
+        # the weights of the samples shared between the nodes are fractional
+        statistics = self.__statistics(class_counts)
+
+        tree_node = TreeNode(
+            self.__node_counter,
+            statistics.size,
+            class_counts.tolist(),
+            statistics.impurity,
+            self.__class_names[statistics.label_index],
+            depth,
+            sample_indexes,
+            hierarchy,
+            available_feature_names,
+        )
+        tree_node._shared_samples = shared_samples
+        tree_node._statistics = statistics
+        tree_node._histograms = histograms
+        tree_node._best_split = None
+
+        self.__node_counter += 1
+
+        return tree_node
+
+    def __bin_numerical_features(self, max_bins: int) -> None:
+        """
+        Replaces the numerical features with the codes of their quantile bins, the
+        float columns are dropped.
+
+        The code of a value is the number of the bin thresholds less than it, missing
+        values get the code following the last bin.
+        """
+        self.__bin_thresholds = {}
+        self.__binned_features = {}
+        for num_feature_name in self.__numerical_feature_names:
+            values = self.__columns[num_feature_name]
+            is_na = np.isnan(values)
+            thresholds = get_bin_thresholds(values[~is_na], max_bins)
+
+            dtype = np.uint8 if len(thresholds) + 2 <= 256 else np.uint16
+            codes = np.searchsorted(thresholds, values).astype(dtype)
+            codes[is_na] = len(thresholds) + 1
+
+            self.__bin_thresholds[num_feature_name] = thresholds
+            self.__binned_features[num_feature_name] = codes
+            del self.__columns[num_feature_name]
+
+    def __histograms(
+        self,
+        sample_indexes: np.ndarray,
+        weights: np.ndarray,
+    ) -> dict[str, np.ndarray]:
+        """
+        Builds the class histograms of the binned features: the weight of the samples
+        of each class in each bin, the last bin is for missing values.
+        """
+        n_classes = len(self.__class_names)
+        y = self.__y_encoded[sample_indexes]
+
+        histograms = {}
+        for num_feature_name, codes in self.__binned_features.items():
+            histograms[num_feature_name] = self.__kernels.class_histogram(
+                codes[sample_indexes],
+                y,
+                weights,
+                len(self.__bin_thresholds[num_feature_name]) + 2,
+                n_classes,
+            )
+
+        return histograms
+
+    def __branches(self, sample_indexes: np.ndarray, split: Split) -> np.ndarray:
+        """
+        Finds the child node of each sample by the split rule: the number of the child
+        node, -1 if the sample gets to none of them, -2 if it gets to all of them
+        (missing values in 'include' mode).
+        """
+        feature_name = split.feature_name
+        if split.split_type == "numerical" and feature_name not in self.__binned_features:
+            values = self.__columns[feature_name][sample_indexes]
+            branches = (values > split.threshold).astype(np.intp)
+            is_na = np.isnan(values)
+            branches[is_na] = -2 if self.__numerical_nan_mode == "include" else -1
+        else:
+            # the codes are the histogram rows, the lookup maps them to the child nodes
+            # binned features split on the codes: the codes up to the bin of the
+            # threshold go to the first child
+            if feature_name in self.__binned_features:
+                rows = self.__binned_features[feature_name][sample_indexes]
+            else:
+                rows = self.__columns[feature_name][sample_indexes]
+            branches = self.__split_lookup(split)[rows]
+
+        return branches
 
-            if use_including_na:
-                mask_less = mask_less | mask_na
-                mask_more = mask_more | mask_na
+    def __node_samples(self, node: TreeNode) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Collects the samples of the node with their weights: the samples of its slice
+        of the permutation, then its shared samples.
+        """
+        own_indexes = self.__order[node._sample_indexes]
+        shared_indexes, shared_weights = node._shared_samples
 
+        return (
+            np.concatenate([own_indexes, shared_indexes]),
+            np.concatenate([self.__sample_weight[own_indexes], shared_weights]),
+        )
+
+    def __split_samples(self, node: TreeNode, split: Split) -> list[dict]:
+        """
+        Splits the samples of the node between the child nodes.
+
+        The slice of the node in the sample permutation is stably reordered in place
+        into the groups of the samples of each child, then of the samples getting to
+        no child. The orders of the numerical features are reordered in the same way,
+        so the slices of the children stay sorted.
+
+        A sample with a missing value of the split feature goes to all the children
+        C4.5-style ('include' mode): in each child its weight is multiplied by the
+        fraction of the weight of the samples with known values getting to the child.
+        Such samples don't fit in the slice of any child, so each child keeps them in
+        its side list of shared samples with their weights, together with the shared
+        samples of the node getting to it. The side lists are freed with the nodes, so
+        the permutation never grows.
+
+        Returns:
+            the keyword arguments of `__create_node` for each child node.
+        """
+        n_childs = 2 if split.split_type == "numerical" else len(split.categories)
+        sample_indexes, weights = self.__node_samples(node)
+        branches = self.__branches(sample_indexes, split)
+
+        own_slice = node._sample_indexes
+        n_own = own_slice.stop - own_slice.start
+        own_indexes = sample_indexes[:n_own]
+        own_branches = branches[:n_own]
+        # stable sorts of small integers are radix sorts
+        key_dtype = np.uint8 if n_childs < 256 else np.int32
+        keys = np.where(own_branches >= 0, own_branches, n_childs).astype(key_dtype)
+
+        group_sizes = np.bincount(keys, minlength=n_childs + 1)
+        bounds = own_slice.start + np.r_[0, group_sizes.cumsum()]
+
+        self.__partition_keys[own_indexes] = keys
+        self.__order[own_slice] = own_indexes[np.argsort(keys, kind="stable")]
+        for sorted_order in self.__sorted_orders.values():
+            sorted_indexes = sorted_order[own_slice]
+            sorted_indexes[:] = sorted_indexes[np.argsort(
+                self.__partition_keys[sorted_indexes].astype(key_dtype), kind="stable")]
+
+        is_known = branches >= 0
+        child_weights = np.bincount(branches[is_known], weights[is_known], minlength=n_childs)
+        na_fractions = child_weights / child_weights.sum()
+
+        is_na = branches == -2
+        is_shared = np.zeros(len(branches), dtype=bool)
+        is_shared[n_own:] = True
+        y = self.__y_encoded[sample_indexes]
+        n_classes = len(self.__class_names)
+        na_counts = np.bincount(y[is_na], weights[is_na], minlength=n_classes)
+
+        childs_kwargs = []
+        for i in range(n_childs):
+            is_child = branches == i
+            is_child_shared = (is_child & is_shared) | is_na
+            childs_kwargs.append(dict(
+                class_counts=(
+                    np.bincount(y[is_child], weights[is_child], minlength=n_classes)
+                    + na_fractions[i] * na_counts
+                ),
+                sample_indexes=slice(bounds[i], bounds[i + 1]),
+                shared_samples=(
+                    sample_indexes[is_child_shared],
+                    np.where(is_na, na_fractions[i] * weights, weights)[is_child_shared],
+                ),
+            ))
+
+        for kwargs, histograms in zip(
+            childs_kwargs,
+            self.__child_histograms(
+                node._histograms, sample_indexes, weights, branches, na_fractions),
+        ):
+            kwargs["histograms"] = histograms
+
+        return childs_kwargs
+
+    def __child_histograms(
+        self,
+        parent_histograms: dict[str, np.ndarray],
+        sample_indexes: np.ndarray,
+        weights: np.ndarray,
+        branches: np.ndarray,
+        na_fractions: np.ndarray,
+    ) -> list[dict[str, np.ndarray]]:
+        """
+        Builds the class histograms of the binned features in the child nodes.
+
+        The histograms of the samples with known values of the largest child are the
+        parent histograms minus the histograms of all the other samples, so they are
+        never scanned. The histograms of the samples getting to all the children are
+        added to each child with its fraction.
+        """
+        if not parent_histograms:
+            return [{} for _ in na_fractions]
+
+        n_childs = len(na_fractions)
+        child_sizes = np.bincount(branches[branches >= 0], minlength=n_childs)
+        largest_i = int(child_sizes.argmax())
+
+        child_histograms = [
+            self.__histograms(sample_indexes[branches == i], weights[branches == i])
+            if i != largest_i else None
+            for i in range(n_childs)
+        ]
+        rest_histograms = [
+            histograms for histograms in child_histograms if histograms is not None]
+        na_histograms = None
+        is_na = branches == -2
+        if is_na.any():
+            na_histograms = self.__histograms(sample_indexes[is_na], weights[is_na])
+            rest_histograms.append(na_histograms)
+        is_dropped = branches == -1
+        if is_dropped.any():
+            rest_histograms.append(
+                self.__histograms(sample_indexes[is_dropped], weights[is_dropped]))
+
+        child_histograms[largest_i] = {
+            num_feature_name: histogram - sum(
+                histograms[num_feature_name] for histograms in rest_histograms)
+            for num_feature_name, histogram in parent_histograms.items()
+        }
+
+        if na_histograms is not None:
+            for histograms, na_fraction in zip(child_histograms, na_fractions):
+                for num_feature_name, na_histogram in na_histograms.items():
+                    histograms[num_feature_name] = (
+                        histograms[num_feature_name] + na_fraction * na_histogram)
+
+        return child_histograms
+
+    def __find_best_split(
+        self,
+        node: TreeNode,
+    ) -> tuple[float, Split | None, list[list] | None]:
+        """
+        Finds the best tree node split, if it exists.
+
+        The features are evaluated independently, in parallel if `n_jobs` allows.
+        With `max_features` a random subset of the available features is evaluated
+        first, with `max_samples_per_split` a random subsample of a large node.
+
+        Parameters:
+            node: the tree node to split.
+
+        Returns:
+            Tuple `(inf_gain, split, feature_values)`.
+              inf_gain: information gain of the split.
+              split: the split rule.
+              feature_values: feature values corresponding to child nodes, None for
+                numerical splits.
+        """
+        sample_indexes = None
+        sample_statistics = node._statistics
+        if node._sample_indexes is not None:
+            sample_indexes, weights = self.__node_samples(node)
+            # a sample may have different weights in different nodes
+            self.__row_weights[sample_indexes] = weights
             if (
-                mask_less.sum() < self.__min_samples_leaf
-                or mask_more.sum() < self.__min_samples_leaf
+                self.__max_samples_per_split
+                and len(sample_indexes) > self.__max_samples_per_split
             ):
-                continue
+                sample_indexes = self.__subsample(sample_indexes)
+                sample_statistics = self.__statistics(self.__class_counts(
+                    sample_indexes, self.__row_weights[sample_indexes]))
+            self.__is_evaluated[sample_indexes] = True
+
+        split_feature_names = node._available_feature_names
+        n_features = self.__n_candidate_features(len(split_feature_names))
+        if n_features < len(split_feature_names):
+            is_candidate = np.zeros(len(split_feature_names), dtype=bool)
+            is_candidate[
+                self.__rng.choice(len(split_feature_names), n_features, replace=False)
+            ] = True
+            # the features keep their order, so do the choices among equal gains
+            feature_name_groups = [
+                list(compress(split_feature_names, is_candidate)),
+                list(compress(split_feature_names, ~is_candidate)),
+            ]
+        else:
+            feature_name_groups = [split_feature_names]
+
+        for feature_names in feature_name_groups:
+            best_split_results = self.__best_feature_split(
+                node, feature_names, sample_indexes, sample_statistics)
+            if best_split_results[1] is not None:
+                break
 
-            child_masks = [mask_less, mask_more]
+        if sample_indexes is not None:
+            self.__is_evaluated[sample_indexes] = False
 
-            inf_gain = self.__information_gain(
-                parent_mask, child_masks, nan_mode=self.__numerical_nan_mode)
+        return best_split_results
 
+    def __best_feature_split(
+        self,
+        node: TreeNode,
+        split_feature_names: list[str],
+        sample_indexes: np.ndarray | None,
+        sample_statistics: NodeStatistics,
+    ) -> tuple[float, Split | None, list[list] | None]:
+        """Finds the best tree node split by one of the features, if it exists."""
+        if self.__executor is not None and len(split_feature_names) > 1:
+            feature_splits = self.__executor.map(
+                lambda split_feature_name: self.__feature_split(
+                    node, split_feature_name, sample_indexes, sample_statistics),
+                split_feature_names,
+            )
+        else:
+            feature_splits = (
+                self.__feature_split(
+                    node, split_feature_name, sample_indexes, sample_statistics)
+                for split_feature_name in split_feature_names
+            )
+
+        best_inf_gain = float("-inf")
+        best_split = None
+        best_feature_values = None
+        for inf_gain, split, feature_values in feature_splits:
             if best_inf_gain < inf_gain:
                 best_inf_gain = inf_gain
-                less_values = [f"<= {threshold}"]
-                more_values = [f"> {threshold}"]
-                best_feature_values = [less_values, more_values]
-                best_child_masks = child_masks
+                best_split = split
+                best_feature_values = feature_values
 
-        return best_inf_gain, best_feature_values, best_child_masks
+        return best_inf_gain, best_split, best_feature_values
+
+    def __n_candidate_features(self, n_available: int) -> int:
+        """The number of the features evaluated first by `max_features`."""
+        n_features = len(self.__feature_names)
+        match self.__max_features:
+            case None:
+                n_candidates = n_available
+            case "sqrt":
+                n_candidates = max(1, int(math.sqrt(n_features)))
+            case "log2":
+                n_candidates = max(1, int(math.log2(n_features)))
+            case float():
+                n_candidates = max(1, int(self.__max_features * n_features))
+            case _:
+                n_candidates = self.__max_features
+
+        return min(n_candidates, n_available)
+
+    def __subsample(self, sample_indexes: np.ndarray) -> np.ndarray:
+        """
+        Draws `max_samples_per_split` of the node samples, their weights are scaled so
+        that the subsample weighs as much as the node.
+        """
+        subsample = sample_indexes[self.__rng.choice(
+            len(sample_indexes), self.__max_samples_per_split, replace=False)]
+        subsample_weight = self.__row_weights[subsample].sum()
+        if subsample_weight > 0:
+            self.__row_weights[subsample] *= (
+                self.__row_weights[sample_indexes].sum() / subsample_weight)
+
+        return subsample
+
+    def __feature_split(
+        self,
+        node: TreeNode,
+        split_feature_name: str,
+        sample_indexes: np.ndarray | None,
+        sample_statistics: NodeStatistics,
+    ) -> tuple[float, Split | None, list[list] | None]:
+        """
+        Finds the best tree node split by the feature, if it exists.
+
+        Parameters:
+            node: the tree node to split.
+            split_feature_name: the feature by which to find the best split.
+            sample_indexes: the evaluated samples of the node, None if the node keeps
+              only the class histograms.
+            sample_statistics: the statistics of the evaluated samples, the class
+              histograms are of all the node samples.
+
+        Returns:
+            Tuple `(inf_gain, split, feature_values)`.
+        """
+        if split_feature_name in self.__numerical_feature_names:
+            if split_feature_name in node._histograms:
+                inf_gain, threshold = self.__hist_num_split(
+                    node._statistics,
+                    node._histograms[split_feature_name],
+                    split_feature_name,
+                )
+            else:
+                sorted_indexes = self.__sorted_samples(
+                    node, split_feature_name, len(sample_indexes))
+                inf_gain, threshold = self.__num_split(
+                    sample_statistics, sorted_indexes, split_feature_name)
+            if threshold is None:
+                return float("-inf"), None, None
+            split = Split("numerical", split_feature_name, threshold=threshold)
+            feature_values = [None, None]
+        elif split_feature_name in self.__categorical_feature_names:
+            table = node._histograms.get(split_feature_name)
+            statistics = node._statistics
+            if table is None:
+                table = self.__code_table(sample_indexes, split_feature_name)
+                statistics = sample_statistics
+            inf_gain, feature_values = self.__best_cat_split(
+                statistics, table, split_feature_name)
+            if feature_values is None:
+                return float("-inf"), None, None
+            split = Split(
+                "categorical",
+                split_feature_name,
+                categories=tuple(frozenset(values) for values in feature_values),
+            )
+        elif split_feature_name in self.__rank_feature_names:
+            table = node._histograms.get(split_feature_name)
+            statistics = node._statistics
+            if table is None:
+                table = self.__code_table(sample_indexes, split_feature_name)
+                statistics = sample_statistics
+            inf_gain, feature_values = self.__best_rank_split(
+                statistics, table, split_feature_name)
+            if feature_values is None:
+                return float("-inf"), None, None
+            split = Split(
+                "rank",
+                split_feature_name,
+                categories=tuple(frozenset(values) for values in feature_values),
+                rank_cut=len(feature_values[0]),
+            )
+        else:
+            return float("-inf"), None, None
+
+        return inf_gain, split, feature_values
+
+    def __sorted_samples(
+        self,
+        node: TreeNode,
+        num_feature_name: str,
+        n_evaluated: int,
+    ) -> np.ndarray:
+        """
+        Sorts the evaluated samples of the node by the numerical feature, missing
+        values go last. The slice of the node is sorted already, so only the shared
+        samples are sorted into it.
+        """
+        sorted_indexes = self.__sorted_orders[num_feature_name][node._sample_indexes]
+        shared_indexes = node._shared_samples[0]
+        if not len(shared_indexes) and len(sorted_indexes) == n_evaluated:
+            return sorted_indexes
+
+        sorted_indexes = np.concatenate([sorted_indexes, shared_indexes])
+        sorted_indexes = sorted_indexes[self.__is_evaluated[sorted_indexes]]
+        if len(shared_indexes):
+            sorted_indexes = sorted_indexes[np.argsort(
+                self.__columns[num_feature_name][sorted_indexes], kind="stable")]
+
+        return sorted_indexes
+
+    def __num_split(
+        self,
+        parent: NodeStatistics,
+        sorted_indexes: np.ndarray,
+        split_feature_name: str,
+    ) -> tuple[float, float | None]:
+        """
+        Finds the best tree node split by set numerical feature, if it exists.
+
+        All the thresholds are evaluated in a single sweep over the node samples sorted
+        by the feature: the class counts of the left child are the cumulative sums of
+        the sorted targets, the class counts of the right child are the rest.
+
+        Parameters:
+            parent: the statistics of the tree node samples.
+            sorted_indexes: indexes of the tree node samples sorted by the feature,
+              samples with missing values go last.
+            split_feature_name: The name of the set numerical feature by which to find
+              the best split.
+
+        Returns:
+            Tuple `(inf_gain, threshold)`.
+              inf_gain: information gain of the split.
+              threshold: the first child node gets the values `<= threshold`,
+                the second one gets the values `> threshold`.
+        """
+        values = self.__columns[split_feature_name][sorted_indexes]
+        is_na = np.isnan(values)
+        N_na = is_na.sum()
+        N_notna = len(values) - N_na
+
+        use_including_na = (
+            self.__numerical_nan_mode == "include"
+            # and there are samples with missing values
+            and N_na
+        )
+
+        # if split by feature value is not possible
+        if N_notna <= 1:
+            return float("-inf"), None
+
+        points = values[:N_notna]
+        cumulative_counts = self.__kernels.cumulative_class_counts(
+            self.__y_encoded[sorted_indexes[:N_notna]],
+            self.__row_weights[sorted_indexes[:N_notna]],
+            len(self.__class_names),
+        )
+        counts_notna = cumulative_counts[-1]
+        # if the samples with known values have zero weights
+        if not counts_notna.sum() > 0:
+            return float("-inf"), None
+
+        # a threshold lies between each pair of neighboring distinct values
+        is_boundary = points[:-1] < points[1:]
+        thresholds = moving_average(points[np.r_[True, is_boundary]], 2)
+        counts_less = cumulative_counts[:-1][is_boundary]
+        counts_more = counts_notna - counts_less
+
+        if use_including_na:
+            # the samples with missing values are shared between the children in
+            # proportion to the weights of the samples with known values
+            counts_na = parent.class_counts - counts_notna
+            fractions_less = counts_less.sum(axis=1) / counts_notna.sum()
+            counts_less += fractions_less[:, np.newaxis] * counts_na
+            counts_more += (1 - fractions_less)[:, np.newaxis] * counts_na
+
+        inf_gains = self.__threshold_gains(parent, counts_less, counts_more)
+
+        if not len(inf_gains) or inf_gains.max() == float("-inf"):
+            return float("-inf"), None
+
+        best_i = inf_gains.argmax()
+        best_inf_gain = inf_gains[best_i]
+        threshold = float(thresholds[best_i])
+
+        return best_inf_gain, threshold
+
+    def __hist_num_split(
+        self,
+        parent: NodeStatistics,
+        histogram: np.ndarray,
+        split_feature_name: str,
+    ) -> tuple[float, float | None]:
+        """
+        Finds the best tree node split by set binned numerical feature, if it exists.
+
+        The thresholds between the bins are evaluated in a single sweep over the class
+        histogram of the node.
+
+        Parameters:
+            parent: the statistics of the tree node samples.
+            histogram: class histogram of the feature bins in the tree node.
+            split_feature_name: The name of the set numerical feature by which to find
+              the best split.
+
+        Returns:
+            Tuple `(inf_gain, threshold)`.
+              inf_gain: information gain of the split.
+              threshold: the first child node gets the values `<= threshold`,
+                the second one gets the values `> threshold`.
+        """
+        counts_notna = histogram[:-1]
+        counts_na = histogram[-1]
+
+        use_including_na = (
+            self.__numerical_nan_mode == "include"
+            # and there are samples with missing values
+            and counts_na.sum()
+        )
+
+        # if split by feature value is not possible
+        if np.count_nonzero(counts_notna.sum(axis=1) > 0) <= 1:
+            return float("-inf"), None
+
+        counts_less = counts_notna[:-1].cumsum(axis=0)
+        counts_more = counts_notna.sum(axis=0) - counts_less
+        # the thresholds outside the range of the node values are not splits
+        is_outside = (counts_less.sum(axis=1) <= 0) | (counts_more.sum(axis=1) <= 0)
+
+        if use_including_na:
+            fractions_less = counts_less.sum(axis=1) / counts_notna.sum()
+            counts_less += fractions_less[:, np.newaxis] * counts_na
+            counts_more += (1 - fractions_less)[:, np.newaxis] * counts_na
+
+        inf_gains = self.__threshold_gains(parent, counts_less, counts_more)
+        inf_gains[is_outside] = float("-inf")
+
+        if not len(inf_gains) or inf_gains.max() == float("-inf"):
+            return float("-inf"), None
+
+        best_i = inf_gains.argmax()
+        best_inf_gain = inf_gains[best_i]
+        threshold = float(self.__bin_thresholds[split_feature_name][best_i])
+
+        return best_inf_gain, threshold
+
+    def __threshold_gains(
+        self,
+        parent: NodeStatistics,
+        counts_less: np.ndarray,
+        counts_more: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Calculates information gains of the numerical or rank splits from the class
+        counts.
+
+        Parameters:
+            parent: the statistics of the tree node samples.
+            counts_less: class counts of the left child node for each threshold.
+            counts_more: class counts of the right child node for each threshold.
+
+        Returns:
+            information gains, -inf for the thresholds violating `min_samples_leaf`.
+        """
+        counts_childs = np.stack([counts_less, counts_more], axis=1)
+
+        inf_gains = self.__information_gain(parent, counts_childs)
+
+        inf_gains[
+            (counts_childs.sum(axis=2) < self.__min_samples_leaf).any(axis=1)
+        ] = float("-inf")
+
+        return inf_gains
+
+    def __code_table(
+        self,
+        parent_indexes: np.ndarray,
+        split_feature_name: str,
+    ) -> np.ndarray:
+        """
+        Builds the value by class counts table of the categorical or rank feature in the
+        tree node with a single weighted bincount. Missing and unknown values (code 0)
+        are counted in the first row.
+        """
+        return self.__kernels.class_histogram(
+            self.__columns[split_feature_name][parent_indexes],
+            self.__y_encoded[parent_indexes],
+            self.__row_weights[parent_indexes],
+            self.__n_histogram_rows(split_feature_name),
+            len(self.__class_names),
+        )
 
     def __best_cat_split(
         self,
-        parent_mask: pd.Series,
+        parent: NodeStatistics,
+        table: np.ndarray,
         split_feature_name: str,
-    ) -> tuple[float, list[list[str]] | None, list[pd.Series] | None]:
+    ) -> tuple[float, list[list[str]] | None]:
         """
         Split a node according to a categorical feature in the best way.
 
+        The class counts of the child nodes of each partition are the sums of the rows
+        of the category by class counts table of the node.
+
         Parameters:
-            parent_mask: boolean mask of split node.
+            parent: the statistics of the split node samples.
+            table: category by class counts table of the split node, the first row is
+              for missing values.
             split_feature_name: feature according to which node should be split.
 
         Returns:
-            Tuple `(inf_gain, feature_values, child_masks)`.
+            Tuple `(inf_gain, feature_values)`.
               inf_gain: information gain of the split.
               feature_values: feature values corresponding to child nodes.
-              child_masks: boolean masks of child nodes.
         """
-        available_feature_values = self.X.loc[parent_mask, split_feature_name].unique()
-        if (
-            self.__categorical_nan_mode == "include"
-            and pd.isna(available_feature_values).any()  # if contains missing values
-        ):
-            available_feature_values = available_feature_values[~pd.isna(available_feature_values)]
-        if len(available_feature_values) <= 1:
-            return float("-inf"), None, None
-        available_feature_values = sorted(available_feature_values)
+        categories = self.__categories[split_feature_name]
+        na_counts = table[0]
+
+        available_codes = np.flatnonzero(table[1:].sum(axis=1))
+        if len(available_codes) <= 1:
+            return float("-inf"), None
+        # the codes in the order of sorted values
+        available_codes = categories.get_indexer(sorted(categories[available_codes]))
+        class_counts = table[1:][available_codes]
+
+        if self.__categorical_split_mode == "exhaustive":
+            candidate_partitions = exact_partitions(
+                class_counts,
+                na_counts,
+                min(self.__max_childs, self.__max_leaf_nodes - self.__leaf_counter + 1),
+                self.__impurity,
+                self.__min_samples_leaf,
+                self.__kernels.group_counts,
+            )
+        else:
+            candidate_partitions = self.__greedy_cat_partitions(class_counts, na_counts)
 
         # get list of all possible partitions
         partitions = []
-        for partition in cat_partitions(available_feature_values):
+        for partition in candidate_partitions:
             # if partitions is not really partitions
             if len(partition) < 2:
                 continue
@@ -945,123 +2714,141 @@ class MultiSplitDecisionTreeClassifier:
             if len(partition) > self.__max_childs:
                 continue
             # if the number of leaves exceeds the limit after splitting
-            if self.__leaf_counter + len(partition) > self.__max_leaf_nodes:
+            if self.__leaf_counter - 1 + len(partition) > self.__max_leaf_nodes:
                 continue
 
             partitions.append(partition)
 
         best_inf_gain = float("-inf")
-        best_feature_values = None
-        best_child_masks = None
-        for feature_values in partitions:
-            inf_gain, child_masks = \
-                self.__cat_split(parent_mask, split_feature_name, feature_values)
+        best_partition = None
+        for partition in partitions:
+            inf_gain = self.__cat_split(parent, class_counts, na_counts, partition)
             if best_inf_gain < inf_gain:
                 best_inf_gain = inf_gain
-                best_child_masks = child_masks
-                best_feature_values = feature_values
+                best_partition = partition
+
+        if best_partition is None:
+            return best_inf_gain, None
+
+        best_feature_values = [
+            categories[available_codes[group]].tolist() for group in best_partition]
 
-        return best_inf_gain, best_feature_values, best_child_masks
+        return best_inf_gain, best_feature_values
+
+    def __greedy_cat_partitions(
+        self,
+        class_counts: np.ndarray,
+        na_counts: np.ndarray,
+    ) -> list[list[list[int]]]:
+        """
+        Finds a few promising partitions of the categorical feature values, at most one
+        for each number of child nodes, from the category by class counts table.
+
+        For a binary target the values are ordered by the probability of the first
+        class and the best partitions into contiguous groups are taken, for
+        a multiclass target the values are merged agglomeratively.
+
+        Parameters:
+            class_counts: class counts of each feature value.
+            na_counts: class counts of the samples with missing values.
+
+        Returns:
+            partitions of the row numbers of `class_counts`.
+        """
+        if len(self.__class_names) == 2:
+            return ordered_partitions(
+                class_counts,
+                na_counts,
+                self.__max_childs,
+                self.__impurity,
+                self.__min_samples_leaf,
+            )
+        else:
+            return agglomerative_partitions(
+                class_counts, na_counts, self.__max_childs, self.__impurity)
 
     def __cat_split(
         self,
-        parent_mask: pd.Series,
-        split_feature_name: str,
-        feature_values: list[list],
-    ) -> tuple[float, list[pd.Series] | None]:
+        parent: NodeStatistics,
+        class_counts: np.ndarray,
+        na_counts: np.ndarray,
+        partition: list[list[int]],
+    ) -> float:
         """
         Split a node according to a categorical feature according to the
         defined feature values.
 
         Parameters:
-            parent_mask: boolean mask of split node.
-            split_feature_name: feature according to which node should be split.
-            feature_values: feature values corresponding to child nodes.
+            parent: the statistics of the split node samples.
+            class_counts: class counts of each feature value.
+            na_counts: class counts of the samples with missing values, they are shared
+              between the child nodes in proportion to the child sizes.
+            partition: row numbers of `class_counts` corresponding to child nodes.
 
         Returns:
-            Tuple `(inf_gain, child_masks)`.
-              inf_gain: information gain of the split.
-              child_masks: boolean masks of child nodes.
+            information gain of the split.
         """
-        mask_na = parent_mask & self.X[split_feature_name].isna()
-
-        child_masks = []
-        for list_ in feature_values:
-            child_mask = parent_mask & (self.X[split_feature_name].isin(list_) | mask_na)
-            if child_mask.sum() < self.__min_samples_leaf:
-                return float("-inf"), None
-            child_masks.append(child_mask)
+        counts_childs = np.array([class_counts[group].sum(axis=0) for group in partition])
+        counts_childs += (
+            counts_childs.sum(axis=1, keepdims=True) / counts_childs.sum() * na_counts)
+        if (counts_childs.sum(axis=1) < self.__min_samples_leaf).any():
+            return float("-inf")
 
-        inf_gain = self.__information_gain(
-            parent_mask, child_masks, nan_mode=self.__categorical_nan_mode)
+        inf_gain = self.__information_gain(parent, counts_childs)
 
-        return inf_gain, child_masks
+        return inf_gain
 
     def __best_rank_split(
         self,
-        parent_mask: pd.Series,
+        parent: NodeStatistics,
+        table: np.ndarray,
         split_feature_name: str,
-    ) -> tuple[float, list[list[str]], list[pd.Series]]:
-        """Split a node according to a rank feature in the best way."""
-        available_feature_values = self.__rank_feature_names[split_feature_name]
-
-        best_inf_gain = float("-inf")
-        best_child_masks = None
-        best_feature_values = None
-        for feature_values in rank_partitions(available_feature_values):
-            inf_gain, child_masks = \
-                self.__rank_split(parent_mask, split_feature_name, feature_values)
-            if best_inf_gain < inf_gain:
-                best_inf_gain = inf_gain
-                best_child_masks = child_masks
-                best_feature_values = feature_values
-
-        return best_inf_gain, best_feature_values, best_child_masks
-
-    def __rank_split(
-        self,
-        parent_mask: pd.Series,
-        split_feature_name: str,
-        feature_values: list[list[str]],
-    ) -> tuple[float, list[pd.Series] | None]:
+    ) -> tuple[float, list[list[str]] | None]:
         """
-        Splits a node according to a rank feature according to the defined feature
-        values.
+        Split a node according to a rank feature in the best way.
+
+        The codes of a rank feature are the positions of the values in the rank order,
+        so all the cuts are evaluated in a single sweep over the level by class counts
+        table of the node: the class counts of the left child are the cumulative sums
+        of its rows. The samples with missing or unknown values (the first row of the
+        table) get to neither child.
         """
-        left_list_, right_list_ = feature_values
+        available_feature_values = self.__rank_feature_names[split_feature_name]
+        counts_levels = table[1:]
 
-        mask_left = parent_mask & self.X[split_feature_name].isin(left_list_)
-        mask_right = parent_mask & self.X[split_feature_name].isin(right_list_)
+        counts_less = counts_levels[:-1].cumsum(axis=0)
+        counts_more = counts_levels.sum(axis=0) - counts_less
 
-        if (
-            mask_left.sum() < self.__min_samples_leaf
-            or mask_right.sum() < self.__min_samples_leaf
-        ):
-            return float("-inf"), None
+        inf_gains = self.__threshold_gains(parent, counts_less, counts_more)
 
-        child_masks = [mask_left, mask_right]
+        if not len(inf_gains) or inf_gains.max() == float("-inf"):
+            return float("-inf"), None
 
-        inf_gain = self.__information_gain(parent_mask, child_masks)
+        rank_cut = inf_gains.argmax() + 1
+        best_inf_gain = inf_gains[rank_cut - 1]
+        best_feature_values = [
+            available_feature_values[:rank_cut],
+            available_feature_values[rank_cut:],
+        ]
 
-        return inf_gain, child_masks
+        return best_inf_gain, best_feature_values
 
     def __information_gain(
         self,
-        parent_mask: pd.Series,
-        child_masks: list[pd.Series],
-        nan_mode: str | None = None,
-    ) -> float:
-        """
+        parent: NodeStatistics,
+        counts_childs: np.ndarray,
+    ) -> float | np.ndarray:
+        r"""
         Calculates information gain of the split.
 
         Parameters:
-            parent_mask: boolean mask of parent node.
-            child_masks: list of boolean masks of child nodes.
-            nan_mode: missing values handling node.
-              If 'include', then turn on normalization of child nodes impurity.
+            parent: the statistics of the parent node samples, its impurity is
+              computed once for all the candidate splits.
+            counts_childs: class counts of child nodes stacked along the second to last
+              axis. Leading axes, if any, enumerate candidate splits.
 
         Returns:
-            information gain.
+            information gain (of each candidate split).
 
         References:
             https://scikit-learn.org/stable/modules/generated/sklearn.tree.DecisionTreeClassifier.html
@@ -1077,22 +2864,14 @@ class MultiSplitDecisionTreeClassifier:
             N_{\text{child}_i} - the number of samples in the child node;
             \text{impurity}_{\text{child}_i} - the child node impurity.
         """
-        N = self.y.shape[0]
-        N_parent = parent_mask.sum()
-
-        impurity_parent = self.__impurity(parent_mask)
+        N = self.__total_weight
+        N_parent = parent.size
+        N_childs = counts_childs.sum(axis=-1)
 
-        weighted_impurity_childs = 0
-        N_childs = 0
-        for child_mask_i in child_masks:
-            N_child_i = child_mask_i.sum()
-            N_childs += N_child_i
-            impurity_child_i = self.__impurity(child_mask_i)
-            weighted_impurity_childs += (N_child_i / N_parent) * impurity_child_i
+        impurity_parent = parent.impurity
+        impurity_childs = self.__impurity(counts_childs)
 
-        if nan_mode == "include":
-            norm_coef = N_parent / N_childs
-            weighted_impurity_childs *= norm_coef
+        weighted_impurity_childs = ((N_childs / N_parent) * impurity_childs).sum(axis=-1)
 
         local_information_gain = impurity_parent - weighted_impurity_childs
 
@@ -1100,57 +2879,39 @@ class MultiSplitDecisionTreeClassifier:
 
         return information_gain
 
-    def __gini_index(self, mask: pd.Series) -> float:
-        """
-        Calculates Gini index in a tree node.
-
-        Gini index formula in LaTeX:
-            \text{Gini Index} = \sum^C_{i=1} p_i \times (1 - p_i)
-            where
-            \text{Gini Index} - Gini index;
-            C - total number of classes;
-            p_i - the probability of choosing a sample with class i.
-        """
-        N = mask.sum()
-
-        gini_index = 0
-        for label in self.__class_names:
-            N_i = (mask & (self.y == label)).sum()
-            p_i = N_i / N
-            gini_index += p_i * (1 - p_i)
-
-        return gini_index
+    def __statistics(self, class_counts: np.ndarray) -> NodeStatistics:
+        """Calculates the statistics of the samples with the class counts."""
+        return NodeStatistics(
+            class_counts=class_counts,
+            size=class_counts.sum().item(),
+            impurity=self.__impurity(class_counts),
+            label_index=int(class_counts.argmax()),
+        )
 
-    def __entropy(self, mask: pd.Series) -> float:
+    def __class_counts(
+        self,
+        sample_indexes: np.ndarray,
+        weights: np.ndarray,
+    ) -> np.ndarray:
+        """Calculates the weight of the samples of each class."""
+        return np.bincount(
+            self.__y_encoded[sample_indexes], weights, minlength=len(self.__class_names))
+
+    def __compile_prediction(self) -> None:
         """
-        Calculates entropy in a tree node.
-
-        Entropy formula in LaTeX:
-        H = \log{\overline{N}} = \sum^N_{i=1} p_i \log{(1/p_i)} = -\sum^N_{i=1} p_i \log{p_i}
-        where
-        H - entropy;
-        \overline{N} - effective number of states;
-        p_i - probability of the i-th system state.
+        Compiles the fitted tree for prediction: into flat arrays for the samples in
+        a DataFrame and into node descriptors for single records, with the values that
+        replace the missing values of both according to the `numerical_nan_mode` and
+        `categorical_nan_mode`.
         """
-        N = mask.sum()
+        self.__flat_tree = FlatTree(self.__root, len(self.__class_names))
 
-        entropy = 0
-        for label in self.__class_names:
-            N_i = (mask & (self.y == label)).sum()
-            if N_i != 0:
-                p_i = N_i / N
-                entropy -= p_i * math.log2(p_i)
-
-        return entropy
-
-    def __distribution(self, mask: pd.Series) -> list[int]:
-        """Calculates the class distribution."""
-        distribution = [
-            (mask & (self.y == class_name)).sum()
-            for class_name in self.__class_names
-        ]
-
-        return distribution
+        self.__fill_values = {}
+        if self.__numerical_nan_mode in ["min", "max"]:
+            self.__fill_values.update(self.__fill_numerical_nan_values)
+        if self.__categorical_nan_mode == "as_category":
+            for cat_feature in self.__categorical_feature_names:
+                self.__fill_values[cat_feature] = self.__categorical_nan_filler
 
     def predict(self, X: pd.DataFrame | pd.Series) -> list[str] | str:
         """
@@ -1168,8 +2929,8 @@ class MultiSplitDecisionTreeClassifier:
                 " Call `fit` with appropriate arguments before using this estimator."
             )
 
-        y_pred_proba_s = self.predict_proba(X)
-        y_pred = [self.__class_names[y_pred_proba.argmax()] for y_pred_proba in y_pred_proba_s]
+        y_pred_proba = self.predict_proba(X)
+        y_pred = [self.__class_names[i] for i in y_pred_proba.argmax(axis=1)]
 
         return y_pred
 
@@ -1195,97 +2956,63 @@ class MultiSplitDecisionTreeClassifier:
 
         # TODO: write __check_predict_proba_data()
 
-        X = self.__preprocess(X)
-
-        y_pred_proba = np.array([
-            self.__predict_proba(self.__root, point)[0]
-            for _, point in X.iterrows()
-        ])
+        y_pred_proba = self.__flat_tree.predict_proba(
+            X, self.__fill_values, get_backend(self.__backend))
 
         return y_pred_proba
 
-    def __preprocess(self, X: pd.DataFrame) -> pd.DataFrame:
+    def predict_one(self, x: dict | tuple) -> str:
         """
-        Preprocesses data for prediction.
+        Predict class for a single sample.
 
-        Fills in the missing values with the corresponding values according to
-        the `categorical_nan_mode` and `numerical_nan_mode`.
+        Parameters:
+            x: The input sample, a dict {feature name: value} or a tuple of the values
+              in the order of the attribute :term:`feature_names`. None and NaN are
+              missing values, as well as the features absent in the dict.
+
+        Returns:
+            The predicted class.
         """
-        X = X.copy()
+        y_pred_proba = self.predict_proba_one(x)
 
-        if self.__numerical_nan_mode in ["min", "max"]:
-            for num_feature in self.__numerical_feature_names:
-                X.fillna(self.__fill_numerical_nan_values[num_feature], inplace=True)
+        return max(y_pred_proba, key=y_pred_proba.get)
 
-        if self.__categorical_nan_mode == "as_category":
-            for cat_feature in self.__categorical_feature_names:
-                X[cat_feature].fillna(self.__categorical_nan_filler, inplace=True)
+    def predict_proba_one(self, x: dict | tuple) -> dict[str, float]:
+        """
+        Predict class probabilities of a single sample.
 
-        return X
+        The tree is walked through its precompiled node descriptors in plain Python,
+        without building a DataFrame, so it's much faster than `predict_proba` for
+        a single sample.
 
-    def __predict_proba(
-        self,
-        node: TreeNode,
-        point: pd.Series,
-    ) -> tuple[np.ndarray, int]:
-        """Predicts class for the sample."""
-        # if we haven't reached a leaf
-        if not node.is_leaf:
-            # but we in a node in which the split rule is set according to some feature,
-            # and the sample in this feature contains a missing value
-            if pd.isna(point[node.split_feature_name]):
-                # then we go to the child nodes for predictions, and then we weighted
-                # average them.
-                distribution_parent = np.array([0., 0., 0.])
-                samples_parent = 0
-                for child in node.childs:
-                    (
-                        y_pred_proba_child,
-                        samples_child,
-                    ) = self.__predict_proba(child, point)
-                    distribution_child = y_pred_proba_child * samples_child
-                    distribution_parent += distribution_child
-                    samples_parent += samples_child
-                y_pred_proba = distribution_parent / distribution_parent.sum()
-                samples = samples_parent
-
-            elif node.split_feature_name in self.__numerical_feature_names:
-                # looking for the branch that needs to be followed
-                threshold = float(node.childs[0].feature_value[0][3:])
-                if point[node.split_feature_name] <= threshold:
-                    y_pred_proba, samples = self.__predict_proba(node.childs[0], point)
-                elif point[node.split_feature_name] > threshold:
-                    y_pred_proba, samples = self.__predict_proba(node.childs[1], point)
-                else:
-                    assert False
+        Parameters:
+            x: The input sample, a dict {feature name: value} or a tuple of the values
+              in the order of the attribute :term:`feature_names`. None and NaN are
+              missing values, as well as the features absent in the dict.
 
-            elif (
-                node.split_feature_name in self.__categorical_feature_names
-                or node.split_feature_name in self.__rank_feature_names
-            ):
-                # looking for the branch that needs to be followed
-                for child in node.childs:
-                    # if found
-                    if child.feature_value == point[node.split_feature_name]:
-                        y_pred_proba, samples = self.__predict_proba(child, point)
-                        # then we can finish the search
-                        break
-                else:
-                    # if there is no such branch TODO
-                    distribution = np.array(node.distribution)
-                    y_pred_proba = distribution / distribution.sum()
-                    samples = node.samples
+        Returns:
+            The dict {class name: class probability}.
+        """
+        if not self.__is_fitted:
+            raise NotFittedError(
+                "This MultiSplitDecisionTree instance is not fitted yet."
+                " Call `fit` with appropriate arguments before using this estimator."
+            )
 
-            else:
-                assert False
+        if isinstance(x, tuple):
+            if len(x) != len(self.__feature_names):
+                raise ValueError(
+                    "x must contain a value for each feature."
+                    f" The number of features is {len(self.__feature_names)}, the number"
+                    f" of values is {len(x)}."
+                )
+            x = dict(zip(self.__feature_names, x))
+        elif not isinstance(x, dict):
+            raise ValueError("x must be a dict or a tuple.")
 
-        # if we have reached a leaf
-        else:
-            distribution = np.array(node.distribution)
-            y_pred_proba = distribution / distribution.sum()
-            samples = node.samples
+        y_pred_proba = self.__flat_tree.predict_proba_one(x, self.__fill_values)
 
-        return y_pred_proba, samples
+        return dict(zip(self.__class_names, y_pred_proba))
 
     def __check_score_data(self, X, y, sample_weight):
         if not isinstance(X, pd.DataFrame):
@@ -1368,6 +3095,14 @@ class MultiSplitDecisionTreeClassifier:
             "numerical_nan_mode": self.__numerical_nan_mode,
             "categorical_nan_mode": self.__categorical_nan_mode,
             "categorical_nan_filler": self.__categorical_nan_filler,
+            "categorical_split_mode": self.__categorical_split_mode,
+            "max_bins": self.__max_bins,
+            "n_jobs": self.__n_jobs,
+            "growth": self.__growth,
+            "max_features": self.__max_features,
+            "max_samples_per_split": self.__max_samples_per_split,
+            "random_state": self.__random_state,
+            "backend": self.__backend,
         }
 
     def set_params(self, **params):
@@ -1450,6 +3185,7 @@ class MultiSplitDecisionTreeClassifier:
         self.__add_node(
             node=self.__root,
             parent_name=None,
+            edge_label=None,
             show_impurity=show_impurity,
             show_num_samples=show_num_samples,
             show_distribution=show_distribution,
@@ -1460,6 +3196,7 @@ class MultiSplitDecisionTreeClassifier:
         self,
         node: TreeNode,
         parent_name: str | None,
+        edge_label: str | None,
         show_impurity: bool,
         show_num_samples: bool,
         show_distribution: bool,
@@ -1487,17 +3224,26 @@ class MultiSplitDecisionTreeClassifier:
         self.__graph.node(name=node_name, label=node_content)
 
         if parent_name:
-            edge_label = "\n".join([str(fv) for fv in node.feature_value])
             self.__graph.edge(
                 tail_name=parent_name,
                 head_name=node_name,
                 label=edge_label,
             )
 
-        for child in node.childs:
+        if node.is_leaf:
+            return
+
+        if node.split.split_type == "numerical":
+            edge_labels = [f"<= {node.split.threshold}", f"> {node.split.threshold}"]
+        else:
+            edge_labels = [
+                "\n".join([str(fv) for fv in child.feature_value]) for child in node.childs]
+
+        for child, child_edge_label in zip(node.childs, edge_labels):
             self.__add_node(
                 node=child,
                 parent_name=node_name,
+                edge_label=child_edge_label,
                 show_impurity=show_impurity,
                 show_num_samples=show_num_samples,
                 show_distribution=show_distribution,
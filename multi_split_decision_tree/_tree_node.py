@@ -1,15 +1,70 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Split:
+    """
+    Split rule of a decision tree node.
+
+    Numerical splits are defined by `threshold`: the first child gets the values
+    `<= threshold`, the second one gets the values `> threshold`. Categorical and rank
+    splits are defined by `categories`, the set of the feature values of each child.
+    Rank splits also store `rank_cut`, the position in the rank order at which the
+    values are cut into the two children.
+    """
+    def __init__(
+        self,
+        split_type: str,
+        feature_name: str,
+        threshold: float | None = None,
+        categories: tuple[frozenset, ...] | None = None,
+        rank_cut: int | None = None,
+    ) -> None:
+        self.split_type = split_type
+        self.feature_name = feature_name
+        self.threshold = threshold
+        self.categories = categories
+        self.rank_cut = rank_cut
+
+    def __repr__(self) -> str:
+        representation = [
+            f'split_type={self.split_type!r}',
+            f'feature_name={self.feature_name!r}',
+        ]
+        if self.threshold is not None:
+            representation.append(f'threshold={self.threshold!r}')
+        if self.categories is not None:
+            representation.append(f'categories={self.categories!r}')
+        if self.rank_cut is not None:
+            representation.append(f'rank_cut={self.rank_cut!r}')
+
+        return f'{self.__class__.__name__}({", ".join(representation)})'
+
+
+class NodeStatistics(NamedTuple):
+    """
+    Sufficient statistics of the samples of a tree node, computed once and shared by
+    all the candidate splits of the node.
+    """
+    class_counts: np.ndarray
+    size: float
+    impurity: float
+    label_index: int
+
+
 class TreeNode:
     """Decision Tree Node."""
     def __init__(
         self,
         number: int,
-        samples: int,
-        distribution: list[int],
+        samples: int | float,
+        distribution: list[int] | list[float],
         impurity: float,
         label: str,
         # technical attributes
         _depth,
-        _mask,
+        _sample_indexes,
         _hierarchy,
         _available_feature_names,
 
@@ -18,6 +73,7 @@ class TreeNode:
         split_feature_name: str | None = None,
         feature_value=None,
         childs: list | None = None,
+        split: Split | None = None,
     ) -> None:
         self.number = number
         self.is_leaf = is_leaf
@@ -28,13 +84,14 @@ class TreeNode:
             self.childs = []
         else:
             self.childs = childs
+        self.split = split
         self.samples = samples
         self.distribution = distribution
         self.impurity = impurity
         self.label = label
         # technical attributes
         self._depth = _depth
-        self._mask = _mask
+        self._sample_indexes = _sample_indexes
         self._hierarchy = _hierarchy
         self._available_feature_names = _available_feature_names
 
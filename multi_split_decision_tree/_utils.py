@@ -3,8 +3,12 @@ import functools
 import numpy as np
 
 
-def cat_partitions(collection: list) -> list[list]:
+def cat_partitions(collection: list, max_groups: int | None = None) -> list[list]:
     """
+    Generates the partitions of the collection, into at most `max_groups` subsets if
+    it's set. The subpartitions with too many subsets are not extended, so only the
+    partitions with at most `max_groups` subsets are built, in the same order.
+
     References:
         https://en.wikipedia.org/wiki/Partition_of_a_set
     """
@@ -13,17 +17,288 @@ def cat_partitions(collection: list) -> list[list]:
         return
 
     first = collection[0]
-    for smaller in cat_partitions(collection[1:]):
+    for smaller in cat_partitions(collection[1:], max_groups):
         # insert `first` in each of the subpartition's subsets
         for n, subset in enumerate(smaller):
             yield smaller[:n] + [[first] + subset] + smaller[n+1:]
         # put `first` in its own subset
-        yield [[first]] + smaller
+        if max_groups is None or len(smaller) < max_groups:
+            yield [[first]] + smaller
+
+
+# the number of partitions up to which they are tabulated and scored at once, beyond
+# it the branch and bound search is faster
+MAX_TABULATED_PARTITIONS = 2000
+
+
+def exact_partitions(
+    class_counts: np.ndarray,
+    na_counts: np.ndarray,
+    max_childs: int | float,
+    impurity,
+    min_samples: int | float = 1,
+    group_counts=None,
+) -> list[list[list[int]]]:
+    """
+    Finds the partition of the categories into at least 2 and at most `max_childs`
+    groups with the minimal cost, the sum of the group sizes times impurities. Of the
+    partitions with the minimal cost the first one in the order of `cat_partitions` is
+    chosen.
+
+    Parameters:
+        class_counts: the number of samples of each class (columns) in each category
+          (rows).
+        na_counts: the number of samples of each class with missing values, which are
+          shared between the groups in proportion to their sizes.
+        max_childs: the maximum number of groups.
+        impurity: impurity function of class counts.
+        min_samples: the minimum number of samples in a group.
+        group_counts: function calculating the class counts of the groups of the
+          tabulated partitions, `one_hot_group_counts` if None.
+
+    Returns:
+        list with the best partition, a list of groups of category indexes, or an
+        empty list if there is no feasible partition.
+    """
+    n_categories = len(class_counts)
+    n_partitions = sum(
+        stirling_number(n_categories, n_groups)
+        for n_groups in range(2, int(min(n_categories, max_childs)) + 1)
+    )
+    if n_partitions <= MAX_TABULATED_PARTITIONS:
+        return tabulated_partitions(
+            class_counts, na_counts, max_childs, impurity, min_samples, group_counts)
+    else:
+        return branch_and_bound_partitions(
+            class_counts, na_counts, max_childs, impurity, min_samples)
+
+
+@functools.lru_cache(maxsize=None)
+def stirling_number(n: int, k: int) -> int:
+    """
+    The number of partitions of `n` values into `k` non-empty groups, the Stirling
+    number of the second kind.
+
+    References:
+        https://en.wikipedia.org/wiki/Stirling_numbers_of_the_second_kind
+    """
+    if n == k:
+        return 1
+    if k == 0 or k > n:
+        return 0
+
+    return k * stirling_number(n - 1, k) + stirling_number(n - 1, k - 1)
+
+
+@functools.lru_cache(maxsize=64)
+def partition_table(n_values: int, max_groups: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Tabulates the partitions of `n_values` values into at least 2 and at most
+    `max_groups` groups in the order of `cat_partitions`.
+
+    Returns:
+        Tuple `(assignments, n_groups)`.
+          assignments: matrix of the group numbers of the values (columns) in each
+            partition (rows).
+          n_groups: the number of groups in each partition.
+    """
+    partitions = [
+        partition
+        for partition in cat_partitions(list(range(n_values)), max_groups)
+        if len(partition) >= 2
+    ]
+    assignments = np.empty((len(partitions), n_values), dtype=np.int8)
+    for i, partition in enumerate(partitions):
+        for group_number, group in enumerate(partition):
+            assignments[i, group] = group_number
+    n_groups = np.array([len(partition) for partition in partitions], dtype=np.int8)
+
+    assignments.flags.writeable = False
+    n_groups.flags.writeable = False
+
+    return assignments, n_groups
+
+
+def one_hot_group_counts(
+    assignments: np.ndarray,
+    max_groups: int,
+    class_counts: np.ndarray,
+) -> np.ndarray:
+    """
+    Calculates the class counts of the groups of each partition as the product of the
+    one-hot encoded group numbers of the categories and their class counts.
+
+    Parameters:
+        assignments: the group numbers of the categories (columns) in each partition
+          (rows).
+        max_groups: the maximum number of groups.
+        class_counts: the number of samples of each class (columns) in each category
+          (rows).
+
+    Returns:
+        the class counts of each group (second axis) of each partition (first axis).
+    """
+    one_hot = assignments[:, np.newaxis, :] == np.arange(max_groups)[:, np.newaxis]
+
+    return one_hot @ class_counts.astype(float)
+
+
+def tabulated_partitions(
+    class_counts: np.ndarray,
+    na_counts: np.ndarray,
+    max_childs: int | float,
+    impurity,
+    min_samples: int | float = 1,
+    group_counts=None,
+) -> list[list[list[int]]]:
+    """
+    Finds the same partition as `exact_partitions` by scoring all the tabulated
+    partitions at once: the class counts of the groups are the products of the one-hot
+    encoded assignments and the category by class counts table.
+    """
+    n_categories = len(class_counts)
+    max_groups = int(min(n_categories, max_childs))
+    if max_groups < 2:
+        return []
+    if group_counts is None:
+        group_counts = one_hot_group_counts
+
+    assignments, n_groups = partition_table(n_categories, max_groups)
+    group_counts = group_counts(assignments, max_groups, class_counts)
+    group_counts += (
+        group_counts.sum(axis=2, keepdims=True) / class_counts.sum() * na_counts)
+    group_sizes = group_counts.sum(axis=2)
+    costs = (group_sizes * impurity(group_counts)).sum(axis=1)
+
+    # the groups beyond the number of groups are empty
+    is_used = np.arange(max_groups) < n_groups[:, np.newaxis]
+    costs[((group_sizes < min_samples) & is_used).any(axis=1)] = np.inf
+    if len(costs) == 0 or costs.min() == np.inf:
+        return []
+
+    tolerance = 1e-9 * group_sizes[0].sum()
+    best = np.flatnonzero(costs <= costs.min() + tolerance)[0]
+    partition = [
+        np.flatnonzero(assignments[best] == group_number).tolist()
+        for group_number in range(n_groups[best])
+    ]
+
+    return [partition]
+
+
+def branch_and_bound_partitions(
+    class_counts: np.ndarray,
+    na_counts: np.ndarray,
+    max_childs: int | float,
+    impurity,
+    min_samples: int | float = 1,
+) -> list[list[list[int]]]:
+    """
+    Finds the same partition as `exact_partitions` by branch and bound over
+    restricted growth strings, so the number of categories isn't limited by the number
+    of their partitions.
+
+    The cost is superadditive: merging two groups never decreases it. So the cost of
+    the groups formed by the assigned categories plus the costs of the unassigned
+    categories on their own bound the cost of any completion from below. Branches are
+    also pruned when the unassigned categories can't fill up the groups smaller than
+    `min_samples`. The first pass finds the minimal cost, assigning large categories
+    first. The second pass finds the first partition with that cost in the order of
+    `cat_partitions`.
+    """
+    n_categories = len(class_counts)
+    max_groups = int(min(n_categories, max_childs))
+    if max_groups < 2:
+        return []
+
+    # the counts of a group are the sums of the counts of its categories with their
+    # shares of the missing values
+    counts = class_counts + (
+        class_counts.sum(axis=1, keepdims=True) / class_counts.sum() * na_counts)
+    sizes = counts.sum(axis=1)
+    costs = sizes * impurity(counts)
+    tolerance = 1e-9 * sizes.sum()
+
+    def search(order, i, groups, total_cost, bound, is_first_pass):
+        """
+        Assigns the category `order[i]` to each of the `groups` (lists
+        `[categories, counts, size, cost]`) or to a new group, the new group goes
+        first. Returns the partition found or None.
+        """
+        rest = order[i + 1:]
+        rest_cost = costs[rest].sum()
+        rest_size = sizes[rest].sum()
+
+        category = order[i]
+        merged_counts = np.array([group[1] for group in groups]) + counts[category]
+        merged_costs = merged_counts.sum(axis=1) * impurity(merged_counts)
+        # the placements are the numbers of the joined groups, the new group is the last
+        placements = list(range(len(groups)))
+        placement_costs = [
+            total_cost - group[3] + merged_cost
+            for group, merged_cost in zip(groups, merged_costs)
+        ]
+        if len(groups) < max_groups:
+            placements.append(len(groups))
+            placement_costs.append(total_cost + costs[category])
+        if is_first_pass:
+            placements.sort(key=lambda placement: placement_costs[placement])
 
+        for placement in placements:
+            child_cost = placement_costs[placement]
+            lower_bound = child_cost + rest_cost
+            if lower_bound >= bound[0] if is_first_pass else lower_bound > bound[0]:
+                continue
 
-def rank_partitions(collection: list) -> list[list]:
-    for i in range(1, len(collection)):
-        yield collection[:i], collection[i:]
+            if placement < len(groups):
+                group = groups[placement]
+                child_groups = groups.copy()
+                child_groups[placement] = [
+                    [category] + group[0],
+                    merged_counts[placement],
+                    group[2] + sizes[category],
+                    merged_costs[placement],
+                ]
+            else:
+                child_groups = [
+                    [[category], counts[category], sizes[category], costs[category]],
+                ] + groups
+
+            deficit = sum(max(0, min_samples - group[2]) for group in child_groups)
+            if deficit > rest_size:
+                continue
+
+            if rest:
+                partition = search(
+                    order, i + 1, child_groups, child_cost, bound, is_first_pass)
+            elif len(child_groups) >= 2 and deficit == 0:
+                partition = [group[0] for group in child_groups]
+            else:
+                partition = None
+
+            if partition is not None:
+                if not is_first_pass:
+                    return partition
+                bound[0] = child_cost - tolerance
+
+        return None
+
+    # first pass: the minimal cost
+    order = np.argsort(-sizes, kind="stable").tolist()
+    bound = [np.inf]
+    first_group = [[order[0]], counts[order[0]], sizes[order[0]], costs[order[0]]]
+    search(order, 1, [first_group], costs[order[0]], bound, True)
+    if bound[0] == np.inf:
+        return []
+
+    # second pass: the first partition with the minimal cost in the order of
+    # `cat_partitions`, it assigns the categories from the last one
+    order = list(range(n_categories - 1, -1, -1))
+    bound[0] += 2 * tolerance
+    first_group = [[order[0]], counts[order[0]], sizes[order[0]], costs[order[0]]]
+    partition = search(order, 1, [first_group], costs[order[0]], bound, False)
+
+    return [partition] if partition is not None else []
 
 
 def counter(function):
@@ -39,13 +314,197 @@ def counter(function):
     return wrapper
 
 
-def get_thresholds(array: np.ndarray) -> np.ndarray:
-    array.sort()
-    array = np.unique(array)
-    thresholds = np.array([]) if len(array) == 1 else moving_average(array, 2)
+def get_bin_thresholds(array: np.ndarray, max_bins: int) -> np.ndarray:
+    """
+    Calculates thresholds splitting the values into at most `max_bins` bins with
+    approximately equal number of values. The thresholds lie halfway between
+    neighboring distinct values.
+    """
+    unique_values = np.unique(array)
+    if len(unique_values) <= 1:
+        return np.array([])
+    if len(unique_values) <= max_bins:
+        return moving_average(unique_values, 2)
+
+    quantiles = np.quantile(array, np.linspace(0, 1, max_bins + 1)[1:-1])
+    i = np.searchsorted(unique_values, quantiles, side="right") - 1
+    i = i.clip(0, len(unique_values) - 2)
+    thresholds = np.unique((unique_values[i] + unique_values[i + 1]) / 2)
 
     return thresholds
 
 
 def moving_average(array: np.ndarray, window: int) -> np.ndarray:
     return np.convolve(array, np.ones(window), mode='valid') / window
+
+
+def gini_index(counts: np.ndarray) -> np.ndarray:
+    r"""
+    Calculates Gini index from the class counts stored along the last axis.
+
+    Gini index formula in LaTeX:
+        \text{Gini Index} = \sum^C_{i=1} p_i \times (1 - p_i)
+        where
+        \text{Gini Index} - Gini index;
+        C - total number of classes;
+        p_i - the probability of choosing a sample with class i.
+    """
+    N = counts.sum(axis=-1)
+    N = np.where(N > 0, N, 1)
+
+    gini_index = 0
+    for i in range(counts.shape[-1]):
+        p_i = counts[..., i] / N
+        gini_index += p_i * (1 - p_i)
+
+    return gini_index
+
+
+def entropy(counts: np.ndarray) -> np.ndarray:
+    r"""
+    Calculates entropy from the class counts stored along the last axis.
+
+    Entropy formula in LaTeX:
+    H = \log{\overline{N}} = \sum^N_{i=1} p_i \log{(1/p_i)} = -\sum^N_{i=1} p_i \log{p_i}
+    where
+    H - entropy;
+    \overline{N} - effective number of states;
+    p_i - probability of the i-th system state.
+    """
+    N = counts.sum(axis=-1)
+    N = np.where(N > 0, N, 1)
+
+    entropy = 0
+    for i in range(counts.shape[-1]):
+        p_i = counts[..., i] / N
+        log_p_i = np.log2(p_i, out=np.zeros_like(p_i), where=p_i > 0)
+        entropy -= p_i * log_p_i
+
+    return entropy
+
+
+def ordered_partitions(
+    class_counts: np.ndarray,
+    na_counts: np.ndarray,
+    max_childs: int | float,
+    impurity,
+    min_samples: int = 1,
+) -> list[list[list[int]]]:
+    """
+    Finds the best partitions of the categories into contiguous groups in order of
+    the first class probability, one partition for each number of groups from 2 to
+    `max_childs`.
+
+    For a binary target the best partition is among them (Breiman's trick
+    generalized to multiway splits). The cost of a partition is additive over its
+    groups, so the best partitions are found by dynamic programming in O(K * L^2)
+    operations.
+
+    Parameters:
+        class_counts: the number of samples of each class (columns) in each category
+          (rows).
+        na_counts: the number of samples of each class with missing values, which are
+          shared between the groups in proportion to their sizes.
+        max_childs: the maximum number of groups.
+        impurity: impurity function of class counts.
+        min_samples: the minimum number of samples in a group.
+
+    Returns:
+        list of partitions, each partition is a list of groups of category indexes.
+
+    References:
+        Breiman L. et al. Classification and Regression Trees. 1984. Section 9.4.
+    """
+    n_categories = len(class_counts)
+    order = np.argsort(
+        class_counts[:, 0] / class_counts.sum(axis=1), kind="stable")
+    cumulative_counts = np.vstack([
+        np.zeros(class_counts.shape[1]), class_counts[order].cumsum(axis=0),
+    ])
+
+    # the cost of the group of the categories from i-th to (j-1)-th in the order
+    segment_counts = (
+        cumulative_counts[np.newaxis, :, :] - cumulative_counts[:, np.newaxis, :])
+    segment_counts += (
+        segment_counts.sum(axis=2, keepdims=True) / class_counts.sum() * na_counts)
+    segment_sizes = segment_counts.sum(axis=2)
+    costs = segment_sizes * impurity(segment_counts)
+    i, j = np.indices(costs.shape)
+    costs[(j <= i) | (segment_sizes < min_samples)] = np.inf
+
+    max_groups = int(min(n_categories, max_childs))
+    best_costs = np.full((max_groups + 1, n_categories + 1), np.inf)
+    best_costs[0, 0] = 0
+    best_starts = np.zeros((max_groups + 1, n_categories + 1), dtype=np.intp)
+    for k in range(1, max_groups + 1):
+        total_costs = best_costs[k - 1][:, np.newaxis] + costs
+        best_starts[k] = total_costs.argmin(axis=0)
+        best_costs[k] = total_costs.min(axis=0)
+
+    partitions = []
+    for k in range(2, max_groups + 1):
+        if best_costs[k, n_categories] == np.inf:
+            continue
+        bounds = [n_categories]
+        for k_ in range(k, 0, -1):
+            bounds.append(best_starts[k_, bounds[-1]])
+        bounds.reverse()
+        partitions.append([
+            sorted(order[start:end].tolist())
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ])
+
+    return partitions
+
+
+def agglomerative_partitions(
+    class_counts: np.ndarray,
+    na_counts: np.ndarray,
+    max_childs: int | float,
+    impurity,
+) -> list[list[list[int]]]:
+    """
+    Partitions the categories into groups by agglomerative merging: starting from
+    a group per category, the pair of groups whose merging increases the total
+    weighted impurity the least is merged, until two groups remain.
+
+    Parameters:
+        class_counts: the number of samples of each class (columns) in each category
+          (rows).
+        na_counts: the number of samples of each class with missing values, which are
+          shared between the groups in proportion to their sizes.
+        max_childs: the maximum number of groups.
+        impurity: impurity function of class counts.
+
+    Returns:
+        list of partitions into at most `max_childs` groups, each partition is a list
+        of groups of category indexes.
+    """
+    groups = [[i] for i in range(len(class_counts))]
+    group_counts = class_counts.astype(np.float64)
+    # the missing values per sample with a known value
+    na_fraction = na_counts / class_counts.sum()
+
+    partitions = []
+    while len(groups) >= 2:
+        if len(groups) <= max_childs:
+            partitions.append([sorted(group) for group in groups])
+        if len(groups) == 2:
+            break
+
+        counts = group_counts + group_counts.sum(axis=1, keepdims=True) * na_fraction
+        costs = counts.sum(axis=1) * impurity(counts)
+        merged_counts = group_counts[:, np.newaxis, :] + group_counts[np.newaxis, :, :]
+        merged_counts += merged_counts.sum(axis=2, keepdims=True) * na_fraction
+        merge_costs = (
+            merged_counts.sum(axis=2) * impurity(merged_counts)
+            - costs[:, np.newaxis] - costs[np.newaxis, :]
+        )
+        merge_costs[np.tril_indices(len(groups))] = np.inf
+
+        a, b = np.unravel_index(merge_costs.argmin(), merge_costs.shape)
+        groups[a].extend(groups.pop(b))
+        group_counts[a] += group_counts[b]
+        group_counts = np.delete(group_counts, b, axis=0)
+
+    return partitions
@@ -0,0 +1,20 @@
+import numpy as np
+
+
+def tree_structure(node, with_splits=False):
+    # the samples with missing values in 'include' mode have fractional weights,
+    # which are summed in different orders
+    return (
+        round(node.samples, 9),
+        np.round(node.distribution, 9).tolist(),
+        node.split_feature_name,
+        # the thresholds found by the exact search and from the bins may differ
+        repr(node.split) if with_splits else None,
+        [tree_structure(child, with_splits) for child in node.childs],
+    )
+
+
+def count_leaves(node):
+    if node.is_leaf:
+        return 1
+    return sum(count_leaves(child) for child in node.childs)
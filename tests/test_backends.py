@@ -0,0 +1,105 @@
+import importlib.util
+import os
+import sys
+sys.path.append(sys.path[0] + '/../')
+
+import numpy as np
+import pandas as pd
+import pytest
+from pytest import param
+
+from multi_split_decision_tree import MultiSplitDecisionTreeClassifier
+from multi_split_decision_tree._backends import NumpyBackend, get_backend
+from multi_split_decision_tree._utils import partition_table
+
+HAS_NUMBA = importlib.util.find_spec('numba') is not None
+
+data = pd.read_csv(os.path.join('tests', 'test_dataset.csv'), index_col=0)
+X = data.drop(columns='Метка')
+y = data['Метка']
+
+
+def test_numpy_backend__kernels():
+    backend = NumpyBackend()
+    y = np.array([0, 1, 1, 2, 0])
+    weights = np.array([1., 2., 1., .5, 1.])
+
+    assert np.array_equal(
+        backend.cumulative_class_counts(y, weights, 3),
+        [[1, 0, 0], [1, 2, 0], [1, 3, 0], [1, 3, .5], [2, 3, .5]],
+    )
+    assert np.array_equal(
+        backend.class_histogram(np.array([0, 0, 2, 2, 1]), y, weights, 4, 3),
+        [[1, 2, 0], [1, 0, 0], [0, 1, .5], [0, 0, 0]],
+    )
+
+    assignments, _ = partition_table(3, 2)
+    class_counts = np.array([[1, 0], [0, 2], [3, 0]])
+    group_counts = backend.group_counts(assignments, 2, class_counts)
+    for partition, counts in zip(assignments, group_counts):
+        for group_number in range(2):
+            assert np.array_equal(
+                counts[group_number], class_counts[partition == group_number].sum(axis=0))
+
+
+def test_get_backend__auto():
+    assert get_backend('auto').name == ('numba' if HAS_NUMBA else 'numpy')
+    assert get_backend('numpy') is get_backend('numpy')
+
+
+@pytest.mark.skipif(HAS_NUMBA, reason='numba is installed')
+def test_get_backend__numba_not_installed():
+    with pytest.raises(ImportError, match='The numba backend requires numba.'):
+        get_backend('numba')
+
+
+@pytest.mark.skipif(not HAS_NUMBA, reason='numba is not installed')
+@pytest.mark.parametrize('criterion', [param('gini'), param('entropy')])
+def test_numba_backend__same_as_numpy(criterion):
+    numpy_backend = get_backend('numpy')
+    numba_backend = get_backend('numba')
+    rng = np.random.default_rng(0)
+    counts = rng.integers(0, 5, size=(4, 6, 3)).astype(float)
+    y = rng.integers(0, 3, size=100)
+    codes = rng.integers(0, 10, size=100)
+    weights = rng.random(100)
+    assignments, _ = partition_table(5, 3)
+
+    assert np.allclose(
+        numba_backend.impurity(criterion)(counts), numpy_backend.impurity(criterion)(counts))
+    assert np.allclose(
+        numba_backend.cumulative_class_counts(y, weights, 3),
+        numpy_backend.cumulative_class_counts(y, weights, 3),
+    )
+    assert np.allclose(
+        numba_backend.class_histogram(codes, y, weights, 10, 3),
+        numpy_backend.class_histogram(codes, y, weights, 10, 3),
+    )
+    assert np.allclose(
+        numba_backend.group_counts(assignments, 3, counts[0, :5]),
+        numpy_backend.group_counts(assignments, 3, counts[0, :5]),
+    )
+
+
+def test_set_params__criterion():
+    msdt = MultiSplitDecisionTreeClassifier(max_depth=3, criterion='gini')
+    msdt.set_params(criterion='entropy')
+    msdt.fit(X.copy(), y)
+    msdt_entropy = MultiSplitDecisionTreeClassifier(max_depth=3, criterion='entropy')
+    msdt_entropy.fit(X.copy(), y)
+
+    assert msdt.tree.impurity == msdt_entropy.tree.impurity
+    assert np.array_equal(msdt.predict_proba(X), msdt_entropy.predict_proba(X))
+
+
+@pytest.mark.skipif(HAS_NUMBA, reason='numba is installed')
+def test_set_params__backend():
+    msdt = MultiSplitDecisionTreeClassifier(max_depth=3, backend='numba')
+    msdt.set_params(backend='numpy')
+    msdt.fit(X.copy(), y)
+
+    msdt.set_params(backend='numba')
+    with pytest.raises(ImportError, match='The numba backend requires numba.'):
+        msdt.predict_proba(X)
+    with pytest.raises(ImportError, match='The numba backend requires numba.'):
+        msdt.fit(X.copy(), y)
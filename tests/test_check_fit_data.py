@@ -4,6 +4,7 @@ import re
 import sys
 sys.path.append(sys.path[0] + '/../')
 
+import numpy as np
 import pandas as pd
 import pytest
 from pytest import param, raises
@@ -71,3 +72,38 @@ def test_check_fit_params(X, y, expected):
         )
 
         msdt.fit(X, y)
+
+
+@pytest.mark.parametrize(
+    ('sample_weight', 'expected'),
+    [
+        param(None, does_not_raise()),
+        param(np.arange(len(y)) % 3, does_not_raise()),
+        param(pd.Series(np.ones(len(y)), index=y.index), does_not_raise()),
+        param(
+            np.ones((len(y), 1)),
+            raises(ValueError, match='sample_weight must be a one-dimensional array.'),
+        ),
+        param(
+            np.ones(len(y) - 1),
+            raises(ValueError, match='X and sample_weight must be the equal length.'),
+        ),
+        param(
+            np.r_[-1, np.ones(len(y) - 1)],
+            raises(
+                ValueError, match='sample_weight must contain non-negative finite numbers.'),
+        ),
+        param(
+            np.r_[np.nan, np.ones(len(y) - 1)],
+            raises(
+                ValueError, match='sample_weight must contain non-negative finite numbers.'),
+        ),
+        param(
+            np.zeros(len(y)),
+            raises(ValueError, match='sample_weight must have a positive sum.'),
+        ),
+    ],
+)
+def test_check_fit_params__sample_weight(sample_weight, expected):
+    with expected:
+        MultiSplitDecisionTreeClassifier().fit(X, y, sample_weight=sample_weight)
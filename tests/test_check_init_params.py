@@ -553,3 +553,247 @@ def test_init_param__categorical_nan_filler(categorical_nan_filler, expected):
 def test_init_params__verbose(verbose, expected):
     with expected:
         MultiSplitDecisionTreeClassifier(verbose=verbose)
+
+
+@pytest.mark.parametrize(
+    ("max_bins", "expected"),
+    [
+        param(None, does_not_raise()),
+        param(255, does_not_raise()),
+        param(
+            1,
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`max_bins` must be an integer and lie in the range [2, 65535]."
+                    " The current value of `max_bins` is 1."
+                ),
+            ),
+        ),
+        param(
+            65536,
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`max_bins` must be an integer and lie in the range [2, 65535]."
+                    " The current value of `max_bins` is 65536."
+                ),
+            ),
+        ),
+        param(
+            "string",
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`max_bins` must be an integer and lie in the range [2, 65535]."
+                    " The current value of `max_bins` is 'string'."
+                ),
+            ),
+        ),
+    ],
+)
+def test_init_params__max_bins(max_bins, expected):
+    with expected:
+        MultiSplitDecisionTreeClassifier(max_bins=max_bins)
+
+
+@pytest.mark.parametrize(
+    ("n_jobs", "expected"),
+    [
+        param(None, does_not_raise()),
+        param(1, does_not_raise()),
+        param(-1, does_not_raise()),
+        param(
+            0,
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`n_jobs` must be a non-zero integer."
+                    " The current value of `n_jobs` is 0."
+                ),
+            ),
+        ),
+        param(
+            1.5,
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`n_jobs` must be a non-zero integer."
+                    " The current value of `n_jobs` is 1.5."
+                ),
+            ),
+        ),
+    ],
+)
+def test_init_params__n_jobs(n_jobs, expected):
+    with expected:
+        MultiSplitDecisionTreeClassifier(n_jobs=n_jobs)
+
+
+@pytest.mark.parametrize(
+    ("growth", "expected"),
+    [
+        param("best_first", does_not_raise()),
+        param("depthwise", does_not_raise()),
+        param(
+            "leafwise",
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`growth` must be Literal['best_first', 'depthwise']."
+                    " The current value of `growth` is 'leafwise'."
+                ),
+            ),
+        ),
+    ],
+)
+def test_init_params__growth(growth, expected):
+    with expected:
+        MultiSplitDecisionTreeClassifier(growth=growth)
+
+
+@pytest.mark.parametrize(
+    ("categorical_split_mode", "expected"),
+    [
+        param("exhaustive", does_not_raise()),
+        param("greedy", does_not_raise()),
+        param(
+            "fast",
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`categorical_split_mode` must be Literal['exhaustive', 'greedy']."
+                    " The current value of `categorical_split_mode` is 'fast'."
+                ),
+            ),
+        ),
+    ],
+)
+def test_init_params__categorical_split_mode(categorical_split_mode, expected):
+    with expected:
+        MultiSplitDecisionTreeClassifier(categorical_split_mode=categorical_split_mode)
+
+
+@pytest.mark.parametrize(
+    ("max_features", "expected"),
+    [
+        param(None, does_not_raise()),
+        param(3, does_not_raise()),
+        param(0.5, does_not_raise()),
+        param(1.0, does_not_raise()),
+        param("sqrt", does_not_raise()),
+        param("log2", does_not_raise()),
+        param(
+            0,
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`max_features` must be an integer strictly greater than 0, a float"
+                    " in the range (0, 1] or Literal['sqrt', 'log2']."
+                    " The current value of `max_features` is 0."
+                ),
+            ),
+        ),
+        param(
+            1.5,
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`max_features` must be an integer strictly greater than 0, a float"
+                    " in the range (0, 1] or Literal['sqrt', 'log2']."
+                    " The current value of `max_features` is 1.5."
+                ),
+            ),
+        ),
+        param(
+            "auto",
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`max_features` must be an integer strictly greater than 0, a float"
+                    " in the range (0, 1] or Literal['sqrt', 'log2']."
+                    " The current value of `max_features` is 'auto'."
+                ),
+            ),
+        ),
+    ],
+)
+def test_init_params__max_features(max_features, expected):
+    with expected:
+        MultiSplitDecisionTreeClassifier(max_features=max_features)
+
+
+@pytest.mark.parametrize(
+    ("max_samples_per_split", "expected"),
+    [
+        param(None, does_not_raise()),
+        param(1000, does_not_raise()),
+        param(
+            1,
+            raises(
+                ValueError,
+                match=(
+                    "`max_samples_per_split` must be an integer and strictly greater"
+                    " than 1. The current value of `max_samples_per_split` is 1."
+                ),
+            ),
+        ),
+        param(
+            100.,
+            raises(
+                ValueError,
+                match=(
+                    "`max_samples_per_split` must be an integer and strictly greater"
+                    " than 1. The current value of `max_samples_per_split` is 100.0."
+                ),
+            ),
+        ),
+    ],
+)
+def test_init_params__max_samples_per_split(max_samples_per_split, expected):
+    with expected:
+        MultiSplitDecisionTreeClassifier(max_samples_per_split=max_samples_per_split)
+
+
+@pytest.mark.parametrize(
+    ("random_state", "expected"),
+    [
+        param(None, does_not_raise()),
+        param(0, does_not_raise()),
+        param(
+            -1,
+            raises(
+                ValueError,
+                match=(
+                    "`random_state` must be a non-negative integer."
+                    " The current value of `random_state` is -1."
+                ),
+            ),
+        ),
+    ],
+)
+def test_init_params__random_state(random_state, expected):
+    with expected:
+        MultiSplitDecisionTreeClassifier(random_state=random_state)
+
+
+@pytest.mark.parametrize(
+    ("backend", "expected"),
+    [
+        param("auto", does_not_raise()),
+        param("numpy", does_not_raise()),
+        param(
+            "cuda",
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`backend` must be Literal['auto', 'numpy', 'numba']."
+                    " The current value of `backend` is 'cuda'."
+                ),
+            ),
+        ),
+    ],
+)
+def test_init_params__backend(backend, expected):
+    with expected:
+        MultiSplitDecisionTreeClassifier(backend=backend)
@@ -0,0 +1,490 @@
+import os
+import sys
+sys.path.append(sys.path[0] + '/../')
+
+import numpy as np
+import pandas as pd
+import pytest
+from pytest import param
+
+from multi_split_decision_tree import MultiSplitDecisionTreeClassifier
+from conftest import count_leaves, tree_structure
+
+data = pd.read_csv(os.path.join('tests', 'test_dataset.csv'), index_col=0)
+X = data.drop(columns='Метка')
+y = data['Метка']
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=3)),
+        param(dict(max_depth=3, numerical_nan_mode='include')),
+        param(dict(max_leaf_nodes=6, criterion='entropy', max_childs=3)),
+    ],
+)
+def test_fit__n_jobs(params):
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    msdt.fit(X.copy(), y)
+    msdt_parallel = MultiSplitDecisionTreeClassifier(n_jobs=2, **params)
+    msdt_parallel.fit(X.copy(), y)
+
+    assert tree_structure(msdt_parallel.tree) == tree_structure(msdt.tree)
+
+
+def brute_force_thresholds(x, y_encoded, weights, nan_mode, min_samples_leaf):
+    # evaluates each threshold between neighboring distinct values from scratch
+    if nan_mode in ('min', 'max'):
+        x = np.where(np.isnan(x), np.nanmin(x) if nan_mode == 'min' else np.nanmax(x), x)
+    is_na = np.isnan(x)
+    counts_na = np.bincount(y_encoded[is_na], weights[is_na], minlength=3)
+    values = np.unique(x[~is_na])
+
+    candidates = []
+    for threshold in (values[:-1] + values[1:]) / 2:
+        counts = [
+            np.bincount(y_encoded[mask], weights[mask], minlength=3)
+            for mask in (~is_na & (x <= threshold), ~is_na & (x > threshold))
+        ]
+        fraction_less = counts[0].sum() / (counts[0].sum() + counts[1].sum())
+        counts = [
+            counts[0] + fraction_less * counts_na,
+            counts[1] + (1 - fraction_less) * counts_na,
+        ]
+        if any(child_counts.sum() < min_samples_leaf for child_counts in counts):
+            continue
+        impurity = sum(
+            child_counts.sum() * (1 - ((child_counts / child_counts.sum()) ** 2).sum())
+            for child_counts in counts
+        )
+        candidates.append((impurity, threshold, counts))
+
+    best_impurity = min(impurity for impurity, _, _ in candidates)
+    return {
+        threshold: counts
+        for impurity, threshold, counts in candidates
+        if impurity <= best_impurity + 1e-9
+    }
+
+
+@pytest.mark.parametrize('nan_mode', ['include', 'min', 'max'])
+@pytest.mark.parametrize('min_samples_leaf', [1, 250])
+@pytest.mark.parametrize('seed', range(3))
+def test_fit__numerical_split_brute_force(nan_mode, min_samples_leaf, seed):
+    rng = np.random.default_rng(seed)
+    n_samples = 300
+    # few distinct values, so there are ties between the samples
+    x = rng.integers(0, 20, size=n_samples).astype(float)
+    y_encoded = np.clip((x + rng.normal(scale=6, size=n_samples)) // 8, 0, 2).astype(int)
+    x[rng.random(n_samples) < 0.2] = np.nan
+    sample_weight = rng.integers(1, 4, size=n_samples).astype(float)
+
+    msdt = MultiSplitDecisionTreeClassifier(
+        max_depth=1, numerical_nan_mode=nan_mode, min_samples_leaf=min_samples_leaf)
+    msdt.fit(
+        pd.DataFrame({'x': x}),
+        pd.Series(np.array(['a', 'b', 'c'])[y_encoded]),
+        sample_weight=sample_weight,
+    )
+    best_thresholds = brute_force_thresholds(
+        x, y_encoded, sample_weight, nan_mode, min_samples_leaf)
+
+    threshold = msdt.tree.split.threshold
+    assert threshold in best_thresholds
+    for child, child_counts in zip(msdt.tree.childs, best_thresholds[threshold]):
+        assert np.allclose(child.distribution, child_counts)
+
+
+@pytest.mark.parametrize('max_leaf_nodes', [2, 3, 5, 8])
+@pytest.mark.parametrize('max_childs', [2, 4])
+def test_fit__max_leaf_nodes(max_leaf_nodes, max_childs):
+    msdt = MultiSplitDecisionTreeClassifier(
+        max_leaf_nodes=max_leaf_nodes, max_childs=max_childs)
+    msdt.fit(X.copy(), y)
+
+    assert count_leaves(msdt.tree) <= max_leaf_nodes
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=3)),
+        param(dict(max_leaf_nodes=4, max_bins=16)),
+        param(dict(max_depth=3, growth='depthwise')),
+        param(dict(max_depth=3, numerical_nan_mode='include')),
+    ],
+)
+def test_fit__releases_node_samples(params):
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    msdt.fit(X.copy(), y)
+
+    nodes = [msdt.tree]
+    for node in nodes:
+        nodes.extend(node.childs)
+        assert node._sample_indexes is None
+        assert node._shared_samples is None
+        assert node._statistics is None
+        assert node._best_split is None
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=8, numerical_nan_mode='include')),
+        param(dict(max_depth=8, numerical_nan_mode='include', max_bins=16)),
+        param(dict(max_depth=6, numerical_nan_mode='include', max_childs=3)),
+    ],
+)
+def test_fit__sample_permutation_is_bounded(monkeypatch, params):
+    # the samples with missing values in 'include' mode go to all the children,
+    # they must not be copied into the permutation for each child
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    split_samples = msdt._MultiSplitDecisionTreeClassifier__split_samples
+    permutation_sizes = []
+
+    def recording_split_samples(node, split):
+        childs_kwargs = split_samples(node, split)
+        permutation_sizes.append(len(msdt._MultiSplitDecisionTreeClassifier__order))
+        return childs_kwargs
+
+    monkeypatch.setattr(
+        msdt, '_MultiSplitDecisionTreeClassifier__split_samples', recording_split_samples)
+    msdt.fit(X.copy(), y)
+
+    assert permutation_sizes
+    assert set(permutation_sizes) == {len(X)}
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=2)),
+        param(dict(max_depth=2, numerical_nan_mode='max', categorical_nan_mode='as_category')),
+    ],
+)
+def test_fit__does_not_modify_input(params):
+    X_fit = X.copy()
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    msdt.fit(X_fit, y)
+
+    pd.testing.assert_frame_equal(X_fit, X)
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=3)),
+        param(dict(max_depth=3, categorical_nan_mode='as_category')),
+    ],
+)
+def test_fit__category_dtype(params):
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    msdt.fit(X.copy(), y)
+
+    X_category = X.copy()
+    for column in X_category.select_dtypes('object').columns:
+        X_category[column] = X_category[column].astype('category')
+    msdt_category = MultiSplitDecisionTreeClassifier(**params)
+    msdt_category.fit(X_category, y)
+
+    assert tree_structure(msdt_category.tree) == tree_structure(msdt.tree)
+
+
+@pytest.mark.parametrize('min_samples_leaf', [1, 10])
+def test_fit__rank_split_equals_numerical_split(min_samples_leaf):
+    rank_feature_name = '32. Количество прерванных беременностей'
+    X_subset = X[[rank_feature_name, '31. Количество родов']]
+
+    msdt_rank = MultiSplitDecisionTreeClassifier(
+        max_depth=3,
+        min_samples_leaf=min_samples_leaf,
+        rank_feature_names={rank_feature_name: list(range(25))},
+    )
+    msdt_rank.fit(X_subset, y)
+    msdt_numerical = MultiSplitDecisionTreeClassifier(
+        max_depth=3,
+        min_samples_leaf=min_samples_leaf,
+    )
+    msdt_numerical.fit(X_subset, y)
+
+    assert tree_structure(msdt_rank.tree) == tree_structure(msdt_numerical.tree)
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=3)),
+        param(dict(max_depth=4, numerical_nan_mode='include', max_bins=16)),
+        param(dict(max_depth=3, categorical_nan_mode='as_category', n_jobs=2)),
+        param(dict(min_samples_leaf=5, criterion='entropy')),
+        param(dict(
+            max_depth=5,
+            hierarchy={'27. Каков тип Вашей занятости?': '31. Количество родов'},
+        )),
+    ],
+)
+def test_fit__depthwise_equals_best_first(params):
+    msdt = MultiSplitDecisionTreeClassifier(**{'max_bins': 255, **params})
+    msdt.fit(X.copy(), y)
+    msdt_depthwise = MultiSplitDecisionTreeClassifier(growth='depthwise', **params)
+    msdt_depthwise.fit(X.copy(), y)
+
+    assert tree_structure(msdt_depthwise.tree) == tree_structure(msdt.tree)
+
+
+def test_fit__depthwise_positions_are_compact(monkeypatch):
+    # the kept positions are int32 slots, only the samples going to several nodes
+    # are listed with their sample numbers
+    msdt = MultiSplitDecisionTreeClassifier(
+        max_depth=4, numerical_nan_mode='include', growth='depthwise')
+    level_histograms = msdt._MultiSplitDecisionTreeClassifier__level_histograms
+    level_positions = []
+
+    def recording_level_histograms(*args):
+        histograms, positions = level_histograms(*args)
+        level_positions.append(positions)
+        return histograms, positions
+
+    monkeypatch.setattr(
+        msdt,
+        '_MultiSplitDecisionTreeClassifier__level_histograms',
+        recording_level_histograms,
+    )
+    msdt.fit(X.copy(), y)
+
+    has_nan = np.flatnonzero(X.select_dtypes('number').isna().any(axis=1).to_numpy())
+    assert any(positions[0][1] is not None for positions in level_positions)
+    for (row_slots, shared), in level_positions:
+        assert row_slots.dtype == np.int32
+        assert len(row_slots) == len(X)
+        if shared is not None:
+            samples, slots, _ = shared
+            assert samples.dtype == slots.dtype == np.int32
+            assert np.isin(samples, has_nan).all()
+            assert (row_slots[samples] == -1).all()
+
+
+@pytest.mark.parametrize('max_leaf_nodes', [2, 3, 5, 8])
+def test_fit__depthwise_max_leaf_nodes(max_leaf_nodes):
+    msdt = MultiSplitDecisionTreeClassifier(
+        max_leaf_nodes=max_leaf_nodes, max_childs=4, growth='depthwise')
+    msdt.fit(X.copy(), y)
+
+    assert count_leaves(msdt.tree) == max_leaf_nodes
+
+
+@pytest.mark.parametrize('max_leaf_nodes', [5, 6, 7, 8])
+def test_fit__depthwise_max_leaf_nodes_searches_again(max_leaf_nodes):
+    # the root splits on x, then each child prefers a 4-way split by its own
+    # categorical feature, the second one must fit into the remaining leaves
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=400)
+    c1, c2 = rng.integers(0, 4, size=(2, 400))
+    X_cat = pd.DataFrame({
+        'x': x,
+        'c1': pd.Categorical(np.array(list('pqrs'))[c1]),
+        'c2': pd.Categorical(np.array(list('pqrs'))[c2]),
+    })
+    y_cat = pd.Series(np.where(
+        x > 0, np.array(list('abcd'))[c1], np.array(list('efgh'))[c2]))
+    msdt = MultiSplitDecisionTreeClassifier(
+        max_leaf_nodes=max_leaf_nodes,
+        max_childs=4,
+        hierarchy={'x': ['c1', 'c2']},
+        growth='depthwise',
+    )
+    msdt.fit(X_cat, y_cat)
+
+    assert count_leaves(msdt.tree) == max_leaf_nodes
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=4, numerical_nan_mode='include')),
+        param(dict(max_depth=4, numerical_nan_mode='include', max_childs=3)),
+        param(dict(max_leaf_nodes=8, numerical_nan_mode='include', min_samples_leaf=5)),
+    ],
+)
+def test_fit__exact_equals_lossless_bins(params):
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    msdt.fit(X.copy(), y)
+    msdt_binned = MultiSplitDecisionTreeClassifier(max_bins=65535, **params)
+    msdt_binned.fit(X.copy(), y)
+
+    assert tree_structure(msdt_binned.tree) == tree_structure(msdt.tree)
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=5)),
+        param(dict(max_depth=5, numerical_nan_mode='max', criterion='entropy')),
+        param(dict(max_leaf_nodes=10, max_childs=3, min_samples_leaf=8)),
+        param(dict(max_depth=4, categorical_nan_mode='as_category', min_samples_split=20)),
+    ],
+)
+def test_fit__binned_equals_exact(params):
+    # each distinct value gets its own bin, so the binned search sees every threshold
+    max_bins = int(X.select_dtypes('number').nunique().max())
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    msdt.fit(X.copy(), y)
+    msdt_binned = MultiSplitDecisionTreeClassifier(max_bins=max_bins, **params)
+    msdt_binned.fit(X.copy(), y)
+
+    # the thresholds may differ, the exact ones lie halfway between the values of
+    # the node, but they split the samples in the same way
+    assert tree_structure(msdt_binned.tree) == tree_structure(msdt.tree)
+    assert np.allclose(msdt_binned.predict_proba(X), msdt.predict_proba(X))
+
+
+def test_fit__binned_features_drop_float_columns(monkeypatch):
+    # once binned, the numerical features are split on their codes only
+    msdt = MultiSplitDecisionTreeClassifier(
+        max_depth=4, max_bins=32, numerical_nan_mode='include')
+    split_samples = msdt._MultiSplitDecisionTreeClassifier__split_samples
+    column_names = []
+
+    def recording_split_samples(node, split):
+        column_names.append(set(msdt._MultiSplitDecisionTreeClassifier__columns))
+        return split_samples(node, split)
+
+    monkeypatch.setattr(
+        msdt, '_MultiSplitDecisionTreeClassifier__split_samples', recording_split_samples)
+    msdt.fit(X.copy(), y)
+
+    numerical_feature_names = set(msdt.numerical_feature_names)
+    assert column_names
+    assert all(not names & numerical_feature_names for names in column_names)
+
+
+def check_node_impurity(node, X_node, y_node, class_names, criterion):
+    # counts the classes of the samples reaching the node one class at a time
+    distribution = [(y_node == class_name).sum() for class_name in class_names]
+    probabilities = np.array(distribution) / len(y_node)
+    probabilities = probabilities[probabilities > 0]
+    if criterion == 'gini':
+        impurity = (probabilities * (1 - probabilities)).sum()
+    else:
+        impurity = -(probabilities * np.log2(probabilities)).sum()
+
+    assert list(node.distribution) == distribution
+    assert node.impurity == pytest.approx(impurity)
+    if not node.is_leaf:
+        is_less = (X_node[node.split_feature_name] <= node.split.threshold).to_numpy()
+        for child, mask in zip(node.childs, [is_less, ~is_less]):
+            check_node_impurity(child, X_node[mask], y_node[mask], class_names, criterion)
+
+
+@pytest.mark.parametrize('criterion', ['gini', 'entropy'])
+def test_fit__node_impurity(criterion):
+    X_numerical = X.select_dtypes('number')
+    msdt = MultiSplitDecisionTreeClassifier(
+        max_depth=4, criterion=criterion, numerical_nan_mode='min')
+    msdt.fit(X_numerical.copy(), y)
+
+    X_filled = X_numerical.fillna(X_numerical.min())
+    check_node_impurity(msdt.tree, X_filled, y, msdt.class_names, criterion)
+
+
+def check_shared_weights(node):
+    assert node.samples == pytest.approx(sum(node.distribution))
+    if not node.is_leaf:
+        assert sum(child.samples for child in node.childs) == pytest.approx(node.samples)
+        for child in node.childs:
+            check_shared_weights(child)
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=6, numerical_nan_mode='include')),
+        param(dict(max_depth=6, numerical_nan_mode='include', max_bins=16)),
+        param(dict(max_depth=6, numerical_nan_mode='include', growth='depthwise')),
+        param(dict(max_leaf_nodes=12, max_childs=4)),
+    ],
+)
+def test_fit__include_mode_shares_weights(params):
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    msdt.fit(X.copy(), y)
+
+    assert msdt.tree.samples == len(X)
+    check_shared_weights(msdt.tree)
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=4)),
+        param(dict(max_depth=4, numerical_nan_mode='include')),
+        param(dict(max_leaf_nodes=8, max_childs=3, min_samples_leaf=10, max_bins=65535)),
+        param(dict(max_depth=4, numerical_nan_mode='include', growth='depthwise', max_bins=65535)),
+        param(dict(max_depth=3, categorical_nan_mode='as_category', criterion='entropy')),
+    ],
+)
+def test_fit__integer_weights_equal_repeated_samples(params):
+    sample_weight = np.random.default_rng(0).integers(1, 4, size=len(X))
+
+    msdt_weighted = MultiSplitDecisionTreeClassifier(**params)
+    msdt_weighted.fit(X.copy(), y, sample_weight=sample_weight)
+    msdt_repeated = MultiSplitDecisionTreeClassifier(**params)
+    msdt_repeated.fit(
+        X.loc[X.index.repeat(sample_weight)], y.loc[y.index.repeat(sample_weight)])
+
+    assert tree_structure(msdt_weighted.tree) == tree_structure(msdt_repeated.tree)
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=4, max_features='sqrt')),
+        param(dict(max_depth=4, max_samples_per_split=100, numerical_nan_mode='include')),
+        param(dict(max_leaf_nodes=10, max_features=0.3, max_samples_per_split=200)),
+        param(dict(max_depth=4, max_features=5, growth='depthwise')),
+    ],
+)
+def test_fit__random_state(params):
+    trees = []
+    for n_jobs in [None, None, 2]:
+        msdt = MultiSplitDecisionTreeClassifier(random_state=0, n_jobs=n_jobs, **params)
+        msdt.fit(X.copy(), y)
+        check_shared_weights(msdt.tree)
+        trees.append(tree_structure(msdt.tree))
+
+    assert trees[0] == trees[1] == trees[2]
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_features=1.0)),
+        param(dict(max_features=X.shape[1])),
+        param(dict(max_samples_per_split=len(X))),
+    ],
+)
+def test_fit__sampling_everything_changes_nothing(params):
+    msdt = MultiSplitDecisionTreeClassifier(max_depth=4)
+    msdt.fit(X.copy(), y)
+    msdt_sampling = MultiSplitDecisionTreeClassifier(max_depth=4, random_state=0, **params)
+    msdt_sampling.fit(X.copy(), y)
+
+    assert tree_structure(msdt_sampling.tree) == tree_structure(msdt.tree)
+
+
+def split_feature_names(node, ancestors=()):
+    if node.is_leaf:
+        return
+    yield node.split_feature_name, ancestors
+    for child in node.childs:
+        yield from split_feature_names(child, ancestors + (node.split_feature_name,))
+
+
+def test_fit__max_features_respects_hierarchy():
+    opening, opened = '8. Есть ли у Вас дети (да/нет)?', '9. Если да, сколько?'
+    msdt = MultiSplitDecisionTreeClassifier(
+        max_depth=6, max_features=2, random_state=1, hierarchy={opening: opened})
+    msdt.fit(X.copy(), y)
+
+    for feature_name, ancestors in split_feature_names(msdt.tree):
+        if feature_name == opened:
+            assert opening in ancestors
@@ -0,0 +1,194 @@
+import os
+import sys
+sys.path.append(sys.path[0] + '/../')
+
+import numpy as np
+import pandas as pd
+import pytest
+from pytest import param, raises
+
+from multi_split_decision_tree import MultiSplitDecisionTreeClassifier
+from conftest import count_leaves, tree_structure
+
+pa = pytest.importorskip('pyarrow')
+from pyarrow import feather  # noqa: E402
+
+data = pd.read_csv(os.path.join('tests', 'test_dataset.csv'), index_col=0)
+X = data.drop(columns='Метка')
+y = data['Метка']
+
+
+sample_weight = np.random.default_rng(0).integers(1, 4, size=len(X)).astype(float)
+
+
+@pytest.fixture(scope='module', params=['parquet', 'arrow'])
+def dataset(request, tmp_path_factory):
+    path = tmp_path_factory.mktemp('dataset') / f'data.{request.param}'
+    if request.param == 'parquet':
+        data.to_parquet(path)
+    else:
+        feather.write_feather(pa.Table.from_pandas(data, preserve_index=False), path)
+
+    return str(path), request.param
+
+
+@pytest.fixture(scope='module')
+def weighted_dataset(tmp_path_factory):
+    path = tmp_path_factory.mktemp('dataset') / 'data.parquet'
+    data.assign(weight=sample_weight).to_parquet(path)
+
+    return str(path), 'parquet'
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=3)),
+        param(dict(max_depth=4, numerical_nan_mode='include')),
+        param(dict(max_depth=3, categorical_nan_mode='as_category')),
+        param(dict(max_depth=3, max_bins=16, criterion='entropy', max_childs=3)),
+        param(dict(min_samples_leaf=5)),
+        param(dict(
+            max_depth=3,
+            rank_feature_names={
+                '32. Количество прерванных беременностей': list(range(25))},
+        )),
+    ],
+)
+def test_fit_from_dataset__equals_fit(dataset, params):
+    path, format = dataset
+    max_bins = params.pop('max_bins', 255)
+
+    msdt = MultiSplitDecisionTreeClassifier(max_bins=max_bins, **params)
+    msdt.fit(X.copy(), y)
+    msdt_dataset = MultiSplitDecisionTreeClassifier(max_bins=max_bins, **params)
+    msdt_dataset.fit_from_dataset(path, 'Метка', format=format, batch_size=37)
+
+    assert (
+        tree_structure(msdt_dataset.tree, with_splits=True)
+        == tree_structure(msdt.tree, with_splits=True)
+    )
+    assert np.allclose(msdt_dataset.predict_proba(X), msdt.predict_proba(X))
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=4)),
+        param(dict(max_depth=4, numerical_nan_mode='include', min_samples_leaf=0.05)),
+    ],
+)
+def test_fit_from_dataset__sample_weight(weighted_dataset, params):
+    path, format = weighted_dataset
+
+    msdt = MultiSplitDecisionTreeClassifier(max_bins=255, **params)
+    msdt.fit(X.copy(), y, sample_weight=sample_weight)
+    msdt_dataset = MultiSplitDecisionTreeClassifier(**params)
+    msdt_dataset.fit_from_dataset(
+        path, 'Метка', format=format, batch_size=37, sample_weight_name='weight')
+
+    assert (
+        tree_structure(msdt_dataset.tree, with_splits=True)
+        == tree_structure(msdt.tree, with_splits=True)
+    )
+    assert set(msdt_dataset.feature_names) == set(X.columns)
+
+
+def test_fit_from_dataset__zero_weight_batch(tmp_path):
+    # the first batch has zero weight, only the total weight must be positive
+    batch_size = 37
+    zero_batch_weight = sample_weight.copy()
+    zero_batch_weight[:batch_size] = 0
+    path = str(tmp_path / 'data.parquet')
+    data.assign(weight=zero_batch_weight).to_parquet(path)
+
+    msdt = MultiSplitDecisionTreeClassifier(max_depth=3, max_bins=255)
+    msdt.fit(X.copy(), y, sample_weight=zero_batch_weight)
+    msdt_dataset = MultiSplitDecisionTreeClassifier(max_depth=3)
+    msdt_dataset.fit_from_dataset(
+        path, 'Метка', batch_size=batch_size, sample_weight_name='weight')
+
+    assert (
+        tree_structure(msdt_dataset.tree, with_splits=True)
+        == tree_structure(msdt.tree, with_splits=True)
+    )
+
+    data.assign(weight=0.).to_parquet(path)
+    with raises(ValueError, match='sample_weight must have a positive sum.'):
+        MultiSplitDecisionTreeClassifier().fit_from_dataset(
+            path, 'Метка', batch_size=batch_size, sample_weight_name='weight')
+
+
+@pytest.mark.parametrize('max_leaf_nodes', [2, 3, 5, 8])
+def test_fit_from_dataset__max_leaf_nodes(dataset, max_leaf_nodes):
+    path, format = dataset
+    msdt = MultiSplitDecisionTreeClassifier(max_leaf_nodes=max_leaf_nodes, max_childs=4)
+    msdt.fit_from_dataset(path, 'Метка', format=format)
+
+    assert count_leaves(msdt.tree) == max_leaf_nodes
+
+
+def test_fit_from_dataset__keeps_no_row_state(dataset, monkeypatch):
+    # each pass routes the batches from the root, nothing per row is kept between
+    # the passes
+    path, format = dataset
+    msdt = MultiSplitDecisionTreeClassifier(max_depth=4, numerical_nan_mode='include')
+    level_histograms = msdt._MultiSplitDecisionTreeClassifier__level_histograms
+    level_positions = []
+
+    def recording_level_histograms(*args):
+        histograms, positions = level_histograms(*args)
+        level_positions.append(positions)
+        return histograms, positions
+
+    monkeypatch.setattr(
+        msdt,
+        '_MultiSplitDecisionTreeClassifier__level_histograms',
+        recording_level_histograms,
+    )
+    msdt.fit_from_dataset(path, 'Метка', format=format, batch_size=37)
+
+    assert len(level_positions) == 4
+    assert all(positions is None for positions in level_positions)
+
+
+@pytest.mark.parametrize(
+    ('kwargs', 'expected'),
+    [
+        param(
+            dict(target_name=0),
+            raises(ValueError, match='`target_name` must be a string.'),
+        ),
+        param(
+            dict(target_name='Класс'),
+            raises(
+                ValueError,
+                match='The target column Класс isnt present in the dataset.',
+            ),
+        ),
+        param(
+            dict(target_name='Метка', format='csv'),
+            raises(ValueError, match=r"`format` must be Literal\['parquet', 'arrow'\]."),
+        ),
+        param(
+            dict(target_name='Метка', batch_size=0),
+            raises(ValueError, match='`batch_size` must be a positive integer.'),
+        ),
+        param(
+            dict(target_name='Метка', sample_weight_name=0),
+            raises(ValueError, match='`sample_weight_name` must be a string or None.'),
+        ),
+        param(
+            dict(target_name='Метка', sample_weight_name='weight'),
+            raises(
+                ValueError,
+                match='The sample weight column weight isnt present in the dataset.',
+            ),
+        ),
+    ],
+)
+def test_fit_from_dataset__check_params(dataset, kwargs, expected):
+    path, format = dataset
+    kwargs = {'format': format, **kwargs}
+    with expected:
+        MultiSplitDecisionTreeClassifier().fit_from_dataset(path, **kwargs)
@@ -0,0 +1,160 @@
+import copy
+import os
+import pickle
+import re
+import sys
+sys.path.append(sys.path[0] + '/../')
+
+import numpy as np
+import pandas as pd
+import pytest
+from pytest import param, raises
+
+from multi_split_decision_tree import MultiSplitDataset, MultiSplitDecisionTreeClassifier
+from conftest import tree_structure
+
+data = pd.read_csv(os.path.join('tests', 'test_dataset.csv'), index_col=0)
+X = data.drop(columns='Метка')
+y = data['Метка']
+
+
+@pytest.mark.parametrize('saved', [False, True])
+@pytest.mark.parametrize(
+    'preprocessing',
+    [
+        param(dict()),
+        param(dict(numerical_nan_mode='include')),
+        param(dict(categorical_nan_mode='as_category')),
+        param(dict(
+            rank_feature_names={
+                '32. Количество прерванных беременностей': list(range(25))},
+        )),
+    ],
+)
+def test_make_dataset__equals_fit(tmp_path, saved, preprocessing):
+    path = tmp_path if saved else None
+    dataset = MultiSplitDecisionTreeClassifier(**preprocessing).make_dataset(X, y, path)
+
+    for params in [
+        dict(max_depth=3),
+        dict(max_leaf_nodes=6, max_childs=3, criterion='entropy'),
+        dict(min_samples_leaf=5),
+    ]:
+        msdt = MultiSplitDecisionTreeClassifier(max_bins=255, **preprocessing, **params)
+        msdt.fit(X.copy(), y)
+        msdt_dataset = MultiSplitDecisionTreeClassifier(**preprocessing, **params)
+        msdt_dataset.fit(dataset)
+
+        assert (
+            tree_structure(msdt_dataset.tree, with_splits=True)
+            == tree_structure(msdt.tree, with_splits=True)
+        )
+        assert np.allclose(msdt_dataset.predict_proba(X), msdt.predict_proba(X))
+
+
+def test_make_dataset__load(tmp_path):
+    dataset = MultiSplitDecisionTreeClassifier().make_dataset(X, y, tmp_path)
+
+    for loaded in [MultiSplitDataset.load(tmp_path), pickle.loads(pickle.dumps(dataset))]:
+        assert isinstance(loaded.features, np.memmap)
+        assert not loaded.features.flags.writeable
+        assert loaded.feature_names == dataset.feature_names
+        assert np.array_equal(loaded.features, dataset.features)
+        assert np.array_equal(loaded.target, dataset.target)
+
+
+@pytest.mark.parametrize(
+    ('params', 'expected'),
+    [
+        param(
+            dict(numerical_nan_mode='max'),
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`numerical_nan_mode` is 'max', but the dataset was made with"
+                    " `numerical_nan_mode`='min'."
+                ),
+            ),
+        ),
+        param(
+            dict(max_bins=16),
+            raises(
+                ValueError,
+                match=re.escape(
+                    "`max_bins` is 16, but the dataset was made with `max_bins`=255.")
+            ),
+        ),
+        param(
+            dict(numerical_feature_names=['3. Семейное положение']),
+            raises(
+                ValueError,
+                match=(
+                    '`numerical_feature_names` contain feature 3. Семейное положение,'
+                    ' which isnt present in `numerical_feature_names` of the dataset.'
+                ),
+            ),
+        ),
+        param(
+            dict(rank_feature_names={'2. Возраст': [1, 2]}),
+            raises(
+                ValueError,
+                match='`rank_feature_names` differ from `rank_feature_names` of the dataset.',
+            ),
+        ),
+    ],
+)
+def test_make_dataset__check_fit(params, expected):
+    dataset = MultiSplitDecisionTreeClassifier().make_dataset(X, y)
+
+    with expected:
+        MultiSplitDecisionTreeClassifier(**params).fit(dataset)
+
+
+def test_make_dataset__fit_with_y():
+    dataset = MultiSplitDecisionTreeClassifier().make_dataset(X, y)
+
+    with raises(ValueError, match='y must be None if X is a MultiSplitDataset.'):
+        MultiSplitDecisionTreeClassifier().fit(dataset, y)
+
+
+def test_make_dataset__sample_weight():
+    sample_weight = np.random.default_rng(0).integers(1, 4, size=len(X)).astype(float)
+    dataset = MultiSplitDecisionTreeClassifier().make_dataset(X, y)
+
+    msdt = MultiSplitDecisionTreeClassifier(max_bins=255, max_depth=4)
+    msdt.fit(X.copy(), y, sample_weight=sample_weight)
+    msdt_dataset = MultiSplitDecisionTreeClassifier(max_depth=4)
+    msdt_dataset.fit(dataset, sample_weight=sample_weight)
+
+    assert (
+        tree_structure(msdt_dataset.tree, with_splits=True)
+        == tree_structure(msdt.tree, with_splits=True)
+    )
+
+
+
+def test_make_dataset__does_not_modify_estimator():
+    numerical_feature_names = ['2. Возраст']
+    params = dict(
+        numerical_feature_names=numerical_feature_names,
+        min_samples_split=0.1,
+        min_samples_leaf=0.05,
+    )
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    expected_params = copy.deepcopy(msdt.get_params())
+    expected_repr = repr(msdt)
+
+    dataset = msdt.make_dataset(X, y)
+
+    assert msdt.get_params() == expected_params
+    assert repr(msdt) == expected_repr
+    assert numerical_feature_names == ['2. Возраст']
+
+    msdt.fit(dataset)
+    msdt_fit = MultiSplitDecisionTreeClassifier(max_bins=255, **copy.deepcopy(params))
+    msdt_fit.fit(X.copy(), y)
+
+    assert (
+        tree_structure(msdt.tree, with_splits=True)
+        == tree_structure(msdt_fit.tree, with_splits=True)
+    )
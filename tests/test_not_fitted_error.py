@@ -45,3 +45,13 @@ def test__score():
 def test__render():
     with raises(NotFittedError):
         _ = NOT_FITTED_MSDT.render()
+
+
+def test__predict_one():
+    with raises(NotFittedError):
+        _ = NOT_FITTED_MSDT.predict_one({})
+
+
+def test__predict_proba_one():
+    with raises(NotFittedError):
+        _ = NOT_FITTED_MSDT.predict_proba_one({})
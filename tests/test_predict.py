@@ -0,0 +1,136 @@
+import importlib.util
+import os
+import sys
+sys.path.append(sys.path[0] + '/../')
+
+import numpy as np
+import pandas as pd
+import pytest
+from pytest import param
+
+from multi_split_decision_tree import MultiSplitDecisionTreeClassifier
+
+data = pd.read_csv(os.path.join('tests', 'test_dataset.csv'), index_col=0)
+X = data.drop(columns='Метка')
+y = data['Метка']
+
+
+def distribution(node, point):
+    """Sum of the class distributions of the leaves the sample reaches."""
+    if node.is_leaf:
+        return np.array(node.distribution, dtype=float)
+
+    value = point[node.split.feature_name]
+    if pd.isna(value):
+        return sum(distribution(child, point) for child in node.childs)
+
+    if node.split.split_type == 'numerical':
+        return distribution(node.childs[int(value > node.split.threshold)], point)
+
+    for child, categories in zip(node.childs, node.split.categories):
+        if value in categories:
+            return distribution(child, point)
+
+    return np.array(node.distribution, dtype=float)
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=3)),
+        param(dict(max_depth=4, numerical_nan_mode='include')),
+        param(dict(max_leaf_nodes=8, criterion='entropy', max_childs=3, numerical_nan_mode='include')),
+        param(dict(max_depth=5, numerical_nan_mode='max', categorical_nan_mode='as_category')),
+    ],
+)
+def test_predict_proba(params):
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    msdt.fit(X.copy(), y)
+
+    X_predict = X.copy()
+    y_pred_proba = msdt.predict_proba(X_predict)
+    pd.testing.assert_frame_equal(X_predict, X)
+
+    X_filled = X
+    numerical_nan_mode = params.get('numerical_nan_mode', 'min')
+    if numerical_nan_mode != 'include':
+        X_filled = X_filled.fillna(getattr(X, numerical_nan_mode)(numeric_only=True))
+    if params.get('categorical_nan_mode') == 'as_category':
+        X_filled = X_filled.fillna(
+            {feature_name: 'missing_value' for feature_name in msdt.categorical_feature_names})
+    expected = np.array([distribution(msdt.tree, point) for _, point in X_filled.iterrows()])
+    expected /= expected.sum(axis=1, keepdims=True)
+    assert np.allclose(y_pred_proba, expected)
+    assert list(msdt.predict(X)) == [msdt.class_names[i] for i in expected.argmax(axis=1)]
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec('numba') is None, reason='numba is not installed')
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=4, numerical_nan_mode='include')),
+        param(dict(max_depth=3, max_bins=16, growth='depthwise')),
+    ],
+)
+def test_predict_proba__numba_backend(params):
+    numpy_msdt = MultiSplitDecisionTreeClassifier(backend='numpy', verbose='critical', **params)
+    numba_msdt = MultiSplitDecisionTreeClassifier(backend='numba', verbose='critical', **params)
+    numpy_msdt.fit(X, y)
+    numba_msdt.fit(X, y)
+
+    assert str(numba_msdt.tree) == str(numpy_msdt.tree)
+    assert np.allclose(numba_msdt.predict_proba(X), numpy_msdt.predict_proba(X))
+
+
+@pytest.mark.parametrize(
+    'params',
+    [
+        param(dict(max_depth=3)),
+        param(dict(max_depth=4, numerical_nan_mode='include')),
+        param(dict(max_depth=4, numerical_nan_mode='max', categorical_nan_mode='as_category')),
+        param(dict(max_leaf_nodes=8, criterion='entropy', max_childs=3, numerical_nan_mode='include')),
+    ],
+)
+def test_predict_proba_one(params):
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    msdt.fit(X.copy(), y)
+
+    y_pred_proba = msdt.predict_proba(X)
+
+    for i, point in enumerate(X.itertuples(index=False)):
+        expected = dict(zip(msdt.class_names, y_pred_proba[i]))
+        y_pred_proba_one = msdt.predict_proba_one(tuple(point))
+        assert list(y_pred_proba_one) == msdt.class_names
+        assert np.allclose(list(y_pred_proba_one.values()), list(expected.values()))
+        assert msdt.predict_proba_one(dict(zip(X.columns, point))) == y_pred_proba_one
+        assert msdt.predict_one(tuple(point)) == max(expected, key=expected.get)
+
+
+def test_predict_proba_one__missing_values():
+    msdt = MultiSplitDecisionTreeClassifier(max_depth=3, numerical_nan_mode='include')
+    msdt.fit(X.copy(), y)
+
+    expected = msdt.predict_proba_one(tuple([None] * X.shape[1]))
+
+    assert msdt.predict_proba_one({}) == expected
+    assert msdt.predict_proba_one(tuple([float('nan')] * X.shape[1])) == expected
+    assert np.allclose(
+        list(expected.values()),
+        msdt.predict_proba(pd.DataFrame([[np.nan] * X.shape[1]], columns=X.columns))[0],
+    )
+
+
+@pytest.mark.parametrize(
+    ('x', 'message'),
+    [
+        param(('a', 'b'), 'x must contain a value for each feature.'),
+        param([1, 2], 'x must be a dict or a tuple.'),
+    ],
+)
+def test_predict_proba_one__wrong_input(x, message):
+    msdt = MultiSplitDecisionTreeClassifier(max_depth=2)
+    msdt.fit(X.copy(), y)
+
+    with pytest.raises(ValueError, match=message):
+        msdt.predict_proba_one(x)
@@ -179,3 +179,71 @@ def test_repr_tree__categorical_nan_filler(categorical_nan_filler, expected):
     msdt = MultiSplitDecisionTreeClassifier(
         categorical_nan_filler=categorical_nan_filler)
     assert repr(msdt) == expected
+
+
+@pytest.mark.parametrize(
+    ('max_bins', 'expected'),
+    [
+        param(None, 'MultiSplitDecisionTreeClassifier()'),
+        param(255, 'MultiSplitDecisionTreeClassifier(max_bins=255)'),
+    ],
+)
+def test_repr_tree__max_bins(max_bins, expected):
+    msdt = MultiSplitDecisionTreeClassifier(max_bins=max_bins)
+    assert repr(msdt) == expected
+
+
+@pytest.mark.parametrize(
+    ('n_jobs', 'expected'),
+    [
+        param(None, 'MultiSplitDecisionTreeClassifier()'),
+        param(-1, 'MultiSplitDecisionTreeClassifier(n_jobs=-1)'),
+    ],
+)
+def test_repr_tree__n_jobs(n_jobs, expected):
+    msdt = MultiSplitDecisionTreeClassifier(n_jobs=n_jobs)
+    assert repr(msdt) == expected
+
+
+@pytest.mark.parametrize(
+    ('growth', 'expected'),
+    [
+        param('best_first', 'MultiSplitDecisionTreeClassifier()'),
+        param('depthwise', "MultiSplitDecisionTreeClassifier(growth='depthwise')"),
+    ],
+)
+def test_repr_tree__growth(growth, expected):
+    msdt = MultiSplitDecisionTreeClassifier(growth=growth)
+    assert repr(msdt) == expected
+
+
+@pytest.mark.parametrize(
+    ('categorical_split_mode', 'expected'),
+    [
+        param('exhaustive', 'MultiSplitDecisionTreeClassifier()'),
+        param('greedy', "MultiSplitDecisionTreeClassifier(categorical_split_mode='greedy')"),
+    ],
+)
+def test_repr_tree__categorical_split_mode(categorical_split_mode, expected):
+    msdt = MultiSplitDecisionTreeClassifier(categorical_split_mode=categorical_split_mode)
+    assert repr(msdt) == expected
+
+
+@pytest.mark.parametrize(
+    ('params', 'expected'),
+    [
+        param(dict(max_features=None), 'MultiSplitDecisionTreeClassifier()'),
+        param(dict(max_features='sqrt'), "MultiSplitDecisionTreeClassifier(max_features='sqrt')"),
+        param(dict(max_features=0.5), 'MultiSplitDecisionTreeClassifier(max_features=0.5)'),
+        param(
+            dict(max_samples_per_split=1000),
+            'MultiSplitDecisionTreeClassifier(max_samples_per_split=1000)',
+        ),
+        param(dict(random_state=0), 'MultiSplitDecisionTreeClassifier(random_state=0)'),
+        param(dict(backend='auto'), 'MultiSplitDecisionTreeClassifier()'),
+        param(dict(backend='numpy'), "MultiSplitDecisionTreeClassifier(backend='numpy')"),
+    ],
+)
+def test_repr_tree__subsampling(params, expected):
+    msdt = MultiSplitDecisionTreeClassifier(**params)
+    assert repr(msdt) == expected
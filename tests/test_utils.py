@@ -0,0 +1,177 @@
+import math
+import sys
+sys.path.append(sys.path[0] + '/../')
+
+import numpy as np
+import pytest
+from pytest import param
+
+from multi_split_decision_tree._utils import (
+    agglomerative_partitions,
+    branch_and_bound_partitions,
+    cat_partitions,
+    entropy,
+    exact_partitions,
+    get_bin_thresholds,
+    gini_index,
+    ordered_partitions,
+    partition_table,
+    tabulated_partitions,
+)
+
+
+def partition_cost(class_counts, na_counts, partition, impurity):
+    group_counts = np.array([class_counts[group].sum(axis=0) for group in partition])
+    group_counts = group_counts + group_counts.sum(axis=1, keepdims=True) / class_counts.sum() * na_counts
+    return (group_counts.sum(axis=1) * impurity(group_counts)).sum()
+
+
+@pytest.mark.parametrize('impurity', [param(gini_index), param(entropy)])
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('with_na', [param(False), param(True)])
+def test_ordered_partitions__binary_optimum(impurity, seed, with_na):
+    rng = np.random.default_rng(seed)
+    class_counts = rng.integers(1, 50, size=(6, 2))
+    na_counts = rng.integers(1, 50, size=2) if with_na else np.zeros(2, dtype=int)
+
+    partitions = ordered_partitions(class_counts, na_counts, 4, impurity)
+
+    assert [len(partition) for partition in partitions] == [2, 3, 4]
+    for partition in partitions:
+        best_cost = min(
+            partition_cost(class_counts, na_counts, candidate, impurity)
+            for candidate in cat_partitions(list(range(6)))
+            if len(candidate) == len(partition)
+        )
+        assert partition_cost(class_counts, na_counts, partition, impurity) == pytest.approx(best_cost)
+
+
+def test_agglomerative_partitions():
+    class_counts = np.array([[10, 0, 0], [9, 1, 0], [0, 10, 0], [0, 0, 10]])
+    na_counts = np.zeros(3, dtype=int)
+
+    partitions = agglomerative_partitions(class_counts, na_counts, 3, gini_index)
+
+    assert partitions == [[[0, 1], [2], [3]], [[0, 1], [2, 3]]]
+
+
+def brute_force_partition(class_counts, na_counts, max_childs, impurity, min_samples):
+    best_cost = float('inf')
+    best_partition = None
+    for partition in cat_partitions(list(range(len(class_counts)))):
+        if len(partition) < 2 or len(partition) > max_childs:
+            continue
+        group_counts = np.array([class_counts[group].sum(axis=0) for group in partition])
+        group_sizes = group_counts.sum(axis=1) * (1 + na_counts.sum() / class_counts.sum())
+        if (group_sizes < min_samples).any():
+            continue
+        cost = partition_cost(class_counts, na_counts, partition, impurity)
+        if cost < best_cost:
+            best_cost = cost
+            best_partition = partition
+
+    return best_partition
+
+
+@pytest.mark.parametrize(
+    'search',
+    [param(exact_partitions), param(tabulated_partitions), param(branch_and_bound_partitions)],
+)
+@pytest.mark.parametrize('impurity', [param(gini_index), param(entropy)])
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize(
+    ('max_childs', 'min_samples'),
+    [param(2, 1), param(3, 5), param(float('inf'), 10)],
+)
+def test_exact_partitions__brute_force(search, impurity, seed, max_childs, min_samples):
+    rng = np.random.default_rng(seed)
+    # small counts so that there are pure categories and ties between partitions
+    class_counts = rng.integers(0, 6, size=(6, 3)).astype(float)
+    class_counts[class_counts.sum(axis=1) == 0, 0] = 1
+    na_counts = rng.integers(0, 3, size=3).astype(float)
+
+    partitions = search(class_counts, na_counts, max_childs, impurity, min_samples)
+
+    best_partition = brute_force_partition(class_counts, na_counts, max_childs, impurity, min_samples)
+    assert partitions == ([best_partition] if best_partition is not None else [])
+
+
+def test_exact_partitions__infeasible():
+    class_counts = np.array([[3, 1], [1, 3]])
+    na_counts = np.zeros(2, dtype=int)
+
+    assert exact_partitions(class_counts, na_counts, 1, gini_index) == []
+    assert exact_partitions(class_counts, na_counts, 2, gini_index, min_samples=5) == []
+    assert exact_partitions(class_counts, na_counts, 2, gini_index, min_samples=4) == [[[0], [1]]]
+
+
+@pytest.mark.parametrize('n_values', range(1, 8))
+def test_cat_partitions__max_groups(n_values):
+    partitions = list(cat_partitions(list(range(n_values))))
+    for max_groups in range(1, n_values + 1):
+        assert list(cat_partitions(list(range(n_values)), max_groups)) == [
+            partition for partition in partitions if len(partition) <= max_groups
+        ]
+
+
+def test_partition_table():
+    assignments, n_groups = partition_table(4, 3)
+
+    partitions = [
+        partition for partition in cat_partitions(list(range(4))) if 2 <= len(partition) <= 3
+    ]
+    assert len(assignments) == len(n_groups) == len(partitions)
+    for row, n, partition in zip(assignments, n_groups, partitions):
+        assert n == len(partition)
+        assert [np.flatnonzero(row == group_number).tolist() for group_number in range(n)] == partition
+    assert partition_table(4, 3)[0] is assignments
+    assert not assignments.flags.writeable
+
+
+def test_get_bin_thresholds():
+    values = np.array([3., 1., 2., 2., 5., 1.])
+    assert np.array_equal(get_bin_thresholds(values, 4), [1.5, 2.5, 4])
+    assert np.array_equal(get_bin_thresholds(values, 255), [1.5, 2.5, 4])
+    assert len(get_bin_thresholds(np.array([7., 7.]), 16)) == 0
+
+    values = np.random.default_rng(0).normal(size=1000)
+    thresholds = get_bin_thresholds(values, 16)
+    assert len(thresholds) <= 15
+    assert np.all(np.diff(thresholds) > 0)
+    bin_sizes = np.bincount(np.searchsorted(thresholds, values), minlength=16)
+    assert bin_sizes.max() - bin_sizes.min() <= 2
+
+
+def per_sample_impurity(y, mask, class_names, criterion):
+    # one pass over the samples for each class
+    N = mask.sum()
+    impurity = 0
+    for label in class_names:
+        N_i = (mask & (y == label)).sum()
+        if N_i != 0:
+            p_i = N_i / N
+            impurity += p_i * (1 - p_i) if criterion == 'gini' else -p_i * math.log2(p_i)
+    return impurity
+
+
+@pytest.mark.parametrize('criterion', ['gini', 'entropy'])
+@pytest.mark.parametrize('seed', range(3))
+def test_impurity__equals_per_sample(criterion, seed):
+    rng = np.random.default_rng(seed)
+    # the last class has no samples
+    class_names = np.array(['a', 'b', 'c', 'd'])
+    y = rng.choice(class_names[:3], size=200, p=[0.6, 0.3, 0.1])
+    masks = [rng.random(len(y)) < fraction for fraction in (0.05, 0.3, 0.7, 1)]
+    impurity = gini_index if criterion == 'gini' else entropy
+
+    counts = np.array([
+        np.bincount(np.searchsorted(class_names, y[mask]), minlength=len(class_names))
+        for mask in masks
+    ])
+    expected = [per_sample_impurity(y, mask, class_names, criterion) for mask in masks]
+
+    for node_counts, node_impurity in zip(counts, expected):
+        assert impurity(node_counts) == pytest.approx(node_impurity)
+    assert np.allclose(impurity(counts), expected)
+    assert np.allclose(impurity(counts.reshape(2, 2, -1)), np.reshape(expected, (2, 2)))
+    assert impurity(np.zeros(len(class_names))) == 0